@@ -1,8 +1,11 @@
+import time
+_T0 = time.perf_counter() # process start, for --startup-report
+
 import argparse
 import asyncio
 from pathlib import Path
 import logging
-from pagecollect.pipeline import run_pipeline
+from pagecollect.startup import StartupReport
 
 _FMT = "%(asctime)s | %(levelname)s | %(message)s"
 
@@ -30,18 +33,49 @@ def setup_logging(args, level=logging.INFO):
     root.addHandler(fh)
     root.addHandler(ch)
 
+async def serve_daemon(args):
+    """
+    Entry point of the long-running crawl daemon
+    """
+    setup_logging(args)
+    from pagecollect.daemon import CrawlDaemon
+    daemon = CrawlDaemon(out_dir=args.jobs_dir, cache_file=args.cache_file)
+    await daemon.serve(port=args.port, socket_path=args.socket)
+
 async def main(args):
     """
-    Entry point for the async runtime
+    Entry point for the async runtime.
+    The pipeline (and its dependencies) is imported here, so `--help`
+    and argument errors return immediately.
     """
+    report = StartupReport(_T0) if args.startup_report else None
     setup_logging(args)
+    start = time.perf_counter()
+    from pagecollect.pipeline import run_pipeline
+    if report:
+        report.add("import pipeline", start, time.perf_counter())
     await run_pipeline(
        args.start_url,
        args.out_file,
        args.num_workers,
        max_pages=args.max_pages,
        max_depth=args.max_depth,
-       cache_file=args.cache_file
+       cache_file=args.cache_file,
+       min_workers=args.min_workers,
+       max_workers=args.max_workers,
+       extract_workers=args.extract_workers,
+       write_workers=args.write_workers,
+       stage_queue_size=args.stage_queue_size,
+       priority=args.priority,
+       refresh_top=args.refresh_top,
+       startup_report=report,
+       max_duration=args.max_duration,
+       grace_period=args.grace_period,
+       checkpoint_file=args.checkpoint_file,
+       boilerplate_share=args.boilerplate_share,
+       change_feed=args.change_feed,
+       trace_file=args.trace_file,
+       trace_sample=args.trace_sample
     )
 
 def get_args():
@@ -49,17 +83,51 @@ def get_args():
     Get command-line arguments
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument('--start-url', type=str, required=True)
+    parser.add_argument('--start-url', type=str, help="required unless --daemon")
     parser.add_argument('--max-pages', type=int, default=100)
     parser.add_argument('--max-depth', type=int, default=3)
-    parser.add_argument('--num-workers', type=int, default=2)
-    parser.add_argument('--out-file', type=str, default="output/pages/out_pages.jsonl", required=True)
+    parser.add_argument('--num-workers', type=int, default=2, help="initial number of workers")
+    parser.add_argument('--min-workers', type=int, default=1)
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--extract-workers', type=int, default=1)
+    parser.add_argument('--write-workers', type=int, default=1)
+    parser.add_argument('--stage-queue-size', type=int, default=16, help="capacity of each queue between stages")
+    parser.add_argument('--priority', type=str, choices=["indegree", "pagerank"], default=None,
+                        help="order the frontier by link-graph score instead of FIFO")
+    parser.add_argument('--refresh-top', type=int, default=0, help="re-fetch the N highest scored cached pages")
+    parser.add_argument('--max-duration', type=float, default=None, help="wall-clock budget of the run in seconds")
+    parser.add_argument('--grace-period', type=float, default=15.0,
+                        help="seconds allowed for in-flight work to drain when stopping")
+    parser.add_argument('--checkpoint-file', type=str, default=None,
+                        help="save pending tasks here when stopped early, and resume from them")
+    parser.add_argument('--boilerplate-share', type=float, default=0.5,
+                        help="drop text blocks found on more than this share of a host's pages (0 disables)")
+    parser.add_argument('--change-feed', action="store_true",
+                        help="re-fetch cached pages and write only upsert/delete events")
+    parser.add_argument('--startup-report', action="store_true", help="log where startup time goes")
+    parser.add_argument('--trace-file', type=str, default=None,
+                        help="save per-task spans here in the Chrome trace-event format")
+    parser.add_argument('--trace-sample', type=float, default=1.0, help="share of URLs to trace")
+    parser.add_argument('--out-file', type=str, default=None, help="required unless --daemon")
     parser.add_argument('--cache-file', type=str, default="output/cache/page_cache.jsonl")
     parser.add_argument('--log-file', type=str, default="output/logs/run.log", required=True)
 
+    parser.add_argument('--daemon', action="store_true", help="serve crawl jobs over a local HTTP API")
+    parser.add_argument('--port', type=int, default=8765, help="daemon port on 127.0.0.1")
+    parser.add_argument('--socket', type=str, default=None, help="serve the daemon on this Unix socket instead")
+    parser.add_argument('--jobs-dir', type=str, default="output/jobs", help="default output folder of daemon jobs")
+
     args = parser.parse_args()
+    if not args.daemon:
+        if not args.start_url:
+            parser.error("--start-url is required")
+        if not args.out_file:
+            parser.error("--out-file is required")
     return args
 
 if __name__ == "__main__":
     args = get_args()
-    asyncio.run(main(args))
+    if args.daemon:
+        asyncio.run(serve_daemon(args))
+    else:
+        asyncio.run(main(args))
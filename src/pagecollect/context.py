@@ -1,17 +1,23 @@
-from aiohttp import ClientSession
+from typing import TYPE_CHECKING
 from pagecollect.crawl.robots import RobotsPolicy
 from pagecollect.storage.page_cache import PageCache
+from pagecollect.crawl.concurrency import ConcurrencyController
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
 
 class WorkerContext:
     """
     Shared runtime context for scrape workers
     """
-    def __init__(self, session: ClientSession = None, 
+    def __init__(self, session: "ClientSession" = None, 
                  robots_policy: RobotsPolicy = None,
                  page_cache: PageCache = None,
-                 rules: dict = None
+                 rules: dict = None,
+                 controller: ConcurrencyController = None
                  ):
         self.session = session
         self.robots_policy = robots_policy
         self.page_cache = page_cache
-        self.rules = rules
\ No newline at end of file
+        self.rules = rules
+        self.controller = controller
\ No newline at end of file
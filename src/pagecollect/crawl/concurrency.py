@@ -0,0 +1,137 @@
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class ConcurrencyController:
+    """
+    AIMD controller for the number of active fetch workers.
+    - Multiplicative decrease when the host is struggling (slow, timeouts, 5xx)
+    - Decrease by one when workers mostly idle behind the rate limiter
+    - Additive increase when fetches are healthy and work is queued
+    """
+    def __init__(self, min_workers: int = 1,
+                 max_workers: int = 8,
+                 initial_workers: int = None,
+                 interval: float = 5.0,
+                 latency_target: float = 2.0,
+                 error_threshold: float = 0.1,
+                 decrease_factor: float = 0.5,
+                 idle_share: float = 0.5
+                 ):
+        self.min_workers = max(min_workers, 1)
+        self.max_workers = max(max_workers, self.min_workers)
+        self.interval = interval
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.decrease_factor = decrease_factor
+        self.idle_share = idle_share
+
+        initial = initial_workers if initial_workers else self.min_workers
+        self.target = self.clamp(initial)
+        self.active = 0
+        self.peak_target = self.target
+        self.decisions = deque(maxlen=100) # most recent decisions
+        self.total_fetches = 0
+        self.total_errors = 0
+        self.reset_window()
+
+    def clamp(self, n: int) -> int:
+        """
+        Keep a worker count within the configured bounds
+        """
+        return min(max(n, self.min_workers), self.max_workers)
+
+    def reset_window(self):
+        """
+        Start a new observation window
+        """
+        self.win_fetches = 0
+        self.win_errors = 0
+        self.win_latency = 0.0
+        self.win_wait = 0.0
+
+    def record_fetch(self, latency: float, wait: float = 0.0, error: bool = False):
+        """
+        Record one fetch attempt:
+        - latency: seconds spent on the HTTP request
+        - wait: seconds spent waiting on the rate limiter
+        - error: timeout, connection error or HTTP 5xx
+        """
+        self.win_fetches += 1
+        self.win_latency += latency
+        self.win_wait += wait
+        self.total_fetches += 1
+        if error:
+            self.win_errors += 1
+            self.total_errors += 1
+
+    def decide(self, queue_depth: int, downstream_full: bool = False) -> int:
+        """
+        Close the current window and compute the new worker target.
+        Do not grow while the downstream stage is full (backpressure)
+        """
+        old_target = self.target
+        n = self.win_fetches
+        avg_latency = self.win_latency / n if n else 0.0
+        avg_wait = self.win_wait / n if n else 0.0
+        error_rate = self.win_errors / n if n else 0.0
+        busy = avg_latency + avg_wait
+        wait_share = avg_wait / busy if busy > 0 else 0.0
+
+        if n and (error_rate > self.error_threshold or avg_latency > self.latency_target):
+            action = "decrease"
+            new_target = int(old_target * self.decrease_factor)
+        elif n and wait_share > self.idle_share:
+            action = "shed"
+            new_target = old_target - 1
+        elif queue_depth > 0 and not downstream_full:
+            action = "increase"
+            new_target = old_target + 1
+        else:
+            action = "hold"
+            new_target = old_target
+
+        self.target = self.clamp(new_target)
+        self.peak_target = max(self.peak_target, self.target)
+        decision = {
+            "action":action,
+            "old_target":old_target,
+            "target":self.target,
+            "fetches":n,
+            "avg_latency":round(avg_latency, 3),
+            "avg_wait":round(avg_wait, 3),
+            "error_rate":round(error_rate, 3),
+            "queue_depth":queue_depth
+        }
+        self.decisions.append(decision)
+        logger.info(f"Workers {old_target} -> {self.target} ({action}), "
+                    f"latency {avg_latency:.2f}s, wait {avg_wait:.2f}s, "
+                    f"errors {error_rate:.0%}, queued {queue_depth}")
+        self.reset_window()
+        return self.target
+
+    def try_retire(self) -> bool:
+        """
+        Called by an active worker between tasks.
+        Return True (and release the slot) if there are more active workers than the target
+        """
+        if self.active > self.target:
+            self.active -= 1
+            return True
+        return False
+
+    def stats(self) -> dict:
+        """
+        Summary of the controller state and recent decisions
+        """
+        return {
+            "target":self.target,
+            "active":self.active,
+            "peak_target":self.peak_target,
+            "min_workers":self.min_workers,
+            "max_workers":self.max_workers,
+            "total_fetches":self.total_fetches,
+            "total_errors":self.total_errors,
+            "decisions":list(self.decisions)
+        }
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 from pagecollect.context import WorkerContext
+from pagecollect.tracing import TaskTrace, span
 
 logger = logging.getLogger(__name__)
 
@@ -12,69 +13,117 @@ last_req_time = 0.0
 class TemporaryFetchError(Exception):
     """
     Marks a *temporary* failure:
-    - e.g., HTTP 5xx
+    - e.g., HTTP 5xx, timeouts, connection and DNS errors
     - Safe to retry
     """
     ...
 
+class FetchError(Exception):
+    """
+    Marks a failed fetch that is not worth retrying (e.g. an invalid URL,
+    too many redirects). Says nothing about the host's health
+    """
+    ...
+
+class PageGoneError(Exception):
+    """
+    Marks a page that no longer exists:
+    - HTTP 404 / 410
+    - Not retried; the change feed emits a delete for it
+    """
+    ...
+
 async def rate_limit():
     """
     Global async rate limiter:
     - Called before every fetch
     - Uses a lock so only one coroutine updates last_req_time at a time
     - Sleeps if the previous request was too recent
+    - Returns the seconds spent waiting
     """
     global last_req_time
+    start = asyncio.get_running_loop().time()
     async with lock:
         now_req_time = asyncio.get_running_loop().time()
         wait = rate - (now_req_time - last_req_time)
         if wait > 0:
             await asyncio.sleep(wait)
         last_req_time = asyncio.get_running_loop().time()
+    return last_req_time - start
 
-async def fetch_page_impl(url: str, worker_context: WorkerContext, timeout=10) -> str | None:
+async def fetch_page_impl(url: str, worker_context: WorkerContext, timeout=10,
+                          trace: TaskTrace = None) -> str | None:
     """
     Perform a single HTTP attempt:
     - No retry logic here
     - Classifies responses by status code
     """
-    async with worker_context.session.get(url, timeout=timeout) as resp:
+    trace_ctx = {"trace":trace} if trace else None
+    async with worker_context.session.get(url, timeout=timeout, trace_request_ctx=trace_ctx) as resp:
         if resp.status == 200:
             content_type = resp.headers.get("Content-Type", "").lower()
             if "text/html" not in content_type:
                logger.info(f"content_type {content_type} not supported: {url}")
                return None   
-            return await resp.text()
+            with span(trace, "download"):
+                return await resp.text()
         if 400 <= resp.status < 500:
             logger.info(f"Skip {url}: {resp.status}")
+            if resp.status in (404, 410):
+                raise PageGoneError(f"HTTP {resp.status}")
         
         if 500 <= resp.status < 600:
-            raise TemporaryFetchError()
+            raise TemporaryFetchError(f"HTTP {resp.status}")
 
         return None
 
-async def fetch_page(url: str, worker_context: WorkerContext, timeout=10, max_attempts: int = 3) -> str | None:
+async def fetch_page(url: str, worker_context: WorkerContext, timeout=10,
+                     trace: TaskTrace = None) -> str | None:
     """
-    Fetch a page with:
+    Fetch a page once with:
     - robots.txt enforcement
     - global rate limiting
-    - automatic retries for temporary failures
+    - fetch latency and errors reported to the concurrency controller
+    Temporary failures (5xx, timeouts, connection errors) raise TemporaryFetchError;
+    the caller decides when to retry, without holding a worker.
+    Missing pages (404, 410) raise PageGoneError; other errors raise FetchError.
+    None means the host answered but there is nothing to extract.
     """
     if worker_context.robots_policy:
-        if not await worker_context.robots_policy.allowed(url):
+        with span(trace, "robots"):
+            allowed = await worker_context.robots_policy.allowed(url)
+        if not allowed:
             return None
 
-    for attempt in range(1, max_attempts+1):
-        await rate_limit()
-        try:
-            return await fetch_page_impl(url, worker_context, timeout=timeout)
-        
-        except (TemporaryFetchError, asyncio.TimeoutError) as e:
-            if attempt >= max_attempts:
-                logger.warning(f"Give up {url}: {e}")
-                return None
-            await asyncio.sleep(3)
+    controller = worker_context.controller
+    loop = asyncio.get_running_loop()
+    with span(trace, "rate limit"):
+        wait = await rate_limit()
+    t_start = loop.time()
+    try:
+        with span(trace, "request"):
+            html = await fetch_page_impl(url, worker_context, timeout=timeout, trace=trace)
+        if controller:
+            controller.record_fetch(loop.time() - t_start, wait=wait)
+        return html
+
+    except PageGoneError:
+        if controller:
+            controller.record_fetch(loop.time() - t_start, wait=wait)
+        raise
+
+    except (TemporaryFetchError, asyncio.TimeoutError) as e:
+        if controller:
+            controller.record_fetch(loop.time() - t_start, wait=wait, error=True)
+        if isinstance(e, TemporaryFetchError):
+            raise
+        raise TemporaryFetchError(f"timeout after {timeout}s") from e
 
-        except Exception as e:
-            logger.error(f"Fetch failed for {url}: {e}")
-            return None
\ No newline at end of file
+    except Exception as e:
+        if controller:
+            controller.record_fetch(loop.time() - t_start, wait=wait, error=True)
+        from aiohttp import ClientConnectionError # loaded with the session already
+        if isinstance(e, ClientConnectionError):
+            raise TemporaryFetchError(f"connection error: {e!r}") from e
+        logger.error(f"Fetch failed for {url}: {e}")
+        raise FetchError(str(e)) from e
@@ -0,0 +1,153 @@
+import heapq
+from collections import OrderedDict
+import itertools
+import logging
+import random
+from pagecollect.frontier import Task
+
+logger = logging.getLogger(__name__)
+
+class RetryScheduler:
+    """
+    Delayed-retry queue: a heap of (due time, seq, task).
+    Failed tasks wait here instead of sleeping inside a worker,
+    so workers always pull ready work.
+    """
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0, max_attempts: int = 3):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.heap = []
+        self.seq = itertools.count()
+        self.scheduled = 0
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Exponential backoff with jitter: a random delay in [d/2, d],
+        where d doubles with every failed attempt
+        """
+        d = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return d / 2 + random.uniform(0, d / 2)
+
+    def schedule(self, task: Task, due: float):
+        """
+        Add a task to run again at loop time `due`
+        """
+        heapq.heappush(self.heap, (due, next(self.seq), task))
+        self.scheduled += 1
+
+    def next_due(self) -> float | None:
+        """
+        Loop time of the earliest retry, if any
+        """
+        if not self.heap:
+            return None
+        return self.heap[0][0]
+
+    def pop_due(self, now: float) -> list[Task]:
+        """
+        Remove and return the tasks that are due at `now`
+        """
+        tasks = []
+        while self.heap and self.heap[0][0] <= now:
+            tasks.append(heapq.heappop(self.heap)[2])
+        return tasks
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+    The last outcome of the host's `window` most recent URLs is kept, so a URL
+    that keeps failing (and its retries) counts once.
+    - closed: requests go through
+    - open: when at least `failure_threshold` of those URLs failed and they are
+      at least `failure_rate` of the window, the host is paused for `cooldown` seconds
+    - half-open: after the cooldown a single probe request is let through;
+      a failed probe opens the circuit again; a probe that ends without an answer
+      from the host (e.g. too many redirects) hands over to the next request
+    Any success closes the circuit.
+    """
+    def __init__(self, failure_threshold: int = 10, failure_rate: float = 0.5, window: int = 20,
+                 cooldown: float = 30.0, probe_wait: float = 1.0):
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window = window
+        self.cooldown = cooldown
+        self.probe_wait = probe_wait
+        self.outcomes = {}   # host -> OrderedDict(url -> failed), most recent last
+        self.open_until = {} # host -> loop time the host is paused until
+        self.probing = set() # hosts with a probe in flight
+        self.opened = 0
+
+    def wait_time(self, host: str, now: float) -> float:
+        """
+        Return 0 if a request to `host` may go now, else the seconds to wait
+        """
+        until = self.open_until.get(host)
+        if until is None:
+            return 0.0
+        if now < until:
+            return until - now
+        if host in self.probing:
+            return self.probe_wait
+        self.probing.add(host)
+        return 0.0
+
+    def end_probe(self, host: str):
+        """
+        The probe ended without telling anything about the host (e.g. a redirect loop):
+        let the next request probe it
+        """
+        self.probing.discard(host)
+
+    def record(self, host: str, url: str, failed: bool):
+        """
+        Keep the latest outcome of a URL in the host's window
+        """
+        outcomes = self.outcomes.setdefault(host, OrderedDict())
+        outcomes.pop(url, None)
+        outcomes[url] = failed
+        if len(outcomes) > self.window:
+            outcomes.popitem(last=False)
+
+    def record_success(self, host: str, url: str):
+        """
+        The host answered: close its circuit
+        """
+        self.record(host, url, False)
+        self.probing.discard(host)
+        if self.open_until.pop(host, None) is not None:
+            self.outcomes[host] = OrderedDict([(url, False)])
+            logger.info(f"Circuit closed for {host}")
+
+    def record_failure(self, host: str, url: str, now: float):
+        """
+        Count a temporary failure and open the circuit when the host looks down
+        """
+        self.record(host, url, True)
+        if host in self.probing:
+            self.probing.discard(host)
+            self.open_until[host] = now + self.cooldown
+            logger.warning(f"Circuit probe failed for {host}, paused {self.cooldown:.0f}s")
+            return
+        if host in self.open_until:
+            return # a request sent before the circuit opened
+        outcomes = self.outcomes[host]
+        failures = sum(outcomes.values())
+        if failures >= self.failure_threshold and failures >= self.failure_rate * len(outcomes):
+            self.open_until[host] = now + self.cooldown
+            self.opened += 1
+            logger.warning(f"Circuit open for {host}: {failures} of its last {len(outcomes)} URLs failed, "
+                           f"paused {self.cooldown:.0f}s")
+
+    def stats(self, now: float = None) -> dict:
+        """
+        Summary of the circuit state; open_hosts are the hosts paused at `now`
+        """
+        return {
+            "opened":self.opened,
+            "open_hosts":sorted(host for host, until in self.open_until.items()
+                                if now is None or until > now)
+        }
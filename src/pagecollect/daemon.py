@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import os
+import signal
+import uuid
+from pathlib import Path
+from aiohttp import web
+
+from pagecollect.pipeline import CrawlRuntime, CrawlPipeline, run_pipeline
+from pagecollect.storage.file_util import read_lines_from
+
+logger = logging.getLogger(__name__)
+
+# run_pipeline options a job may set -> expected JSON type
+JOB_OPTIONS = {
+    "max_pages":int,
+    "max_depth":int,
+    "cache_file":str,
+    "num_workers":int,
+    "min_workers":int,
+    "max_workers":int,
+    "extract_workers":int,
+    "write_workers":int,
+    "stage_queue_size":int,
+    "priority":str,
+    "refresh_top":int,
+    "max_duration":float,
+    "grace_period":float,
+    "checkpoint_file":str,
+    "boilerplate_share":float,
+    "change_feed":bool,
+    "out_file":str
+}
+# options that may be null (their run_pipeline default)
+NULLABLE_OPTIONS = {"max_pages", "max_depth", "priority", "max_duration", "checkpoint_file", "out_file"}
+PRIORITIES = {"indegree", "pagerank"}
+
+def option_error(name: str, value) -> str | None:
+    """
+    Why a job option value is invalid, None if it is valid
+    """
+    if value is None:
+        return None if name in NULLABLE_OPTIONS else f"{name} must not be null"
+    kind = JOB_OPTIONS[name]
+    if kind is float:
+        valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    elif kind is int:
+        valid = isinstance(value, int) and not isinstance(value, bool)
+    else:
+        valid = isinstance(value, kind)
+    if not valid:
+        return f"{name} must be {'a number' if kind is float else 'of type ' + kind.__name__}"
+    if name == "priority" and value not in PRIORITIES:
+        return f"priority must be one of {sorted(PRIORITIES)}"
+    return None
+
+class CrawlJob:
+    """
+    A crawl submitted to the daemon
+    """
+    def __init__(self, job_id: str, start_url: str, out_file: str, options: dict):
+        self.job_id = job_id
+        self.start_url = start_url
+        self.out_file = out_file
+        self.options = options
+        self.state = "running" # running -> stopping -> done | cancelled | failed
+        self.pipeline: CrawlPipeline = None # released when the job finishes
+        self.collected_pages = 0 # final count, once the pipeline is released
+        self.stats = None
+        self.error = None
+        self.task = None
+        # results are streamed from the lines appended after submission
+        self.out_offset = os.path.getsize(out_file) if os.path.exists(out_file) else 0
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the job reached a final state
+        """
+        return self.state in {"done", "cancelled", "failed"}
+
+    def cancel(self):
+        """
+        Stop the job gracefully (in-flight work drains, output is flushed)
+        """
+        if self.finished:
+            return
+        self.state = "stopping"
+        if self.pipeline:
+            self.pipeline.request_stop("cancelled")
+
+    def status(self) -> dict:
+        """
+        JSON-serializable job status
+        """
+        status = {
+            "id":self.job_id,
+            "start_url":self.start_url,
+            "out_file":self.out_file,
+            "state":self.state,
+            "options":self.options
+        }
+        if self.pipeline:
+            status["collected_pages"] = self.pipeline.frontier.collected_pages
+            status["stages"] = self.pipeline.stage_report()
+        elif self.finished:
+            status["collected_pages"] = self.collected_pages
+        if self.stats:
+            status["stats"] = self.stats
+        if self.error:
+            status["error"] = self.error
+        return status
+
+class CrawlDaemon:
+    """
+    Long-running crawl service.
+    One event loop, one connection pool and warm caches (CrawlRuntime) are kept
+    alive across jobs, and jobs run concurrently under the shared rate limiter
+    and host circuit breakers.
+    Local HTTP API:
+    - POST   /jobs               submit {"start_url", "out_file", ...run_pipeline options}
+    - GET    /jobs               list jobs
+    - GET    /jobs/{id}          job status
+    - DELETE /jobs/{id}          cancel (graceful drain)
+    - GET    /jobs/{id}/results  stream the job's documents as JSONL until it finishes
+    """
+    def __init__(self, out_dir: str = "output/jobs", cache_file: str = "output/cache/page_cache.jsonl"):
+        self.out_dir = out_dir
+        self.cache_file = cache_file
+        self.runtime = CrawlRuntime()
+        self.jobs = {}
+
+    def make_app(self) -> web.Application:
+        """
+        Build the aiohttp application serving the job API
+        """
+        app = web.Application()
+        app.router.add_post("/jobs", self.submit)
+        app.router.add_get("/jobs", self.list_jobs)
+        app.router.add_get("/jobs/{job_id}", self.get_status)
+        app.router.add_delete("/jobs/{job_id}", self.cancel)
+        app.router.add_get("/jobs/{job_id}/results", self.stream_results)
+        return app
+
+    def get_job(self, request: web.Request) -> CrawlJob:
+        """
+        Look up the job addressed by the request, or answer 404
+        """
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            raise web.HTTPNotFound(reason="unknown job")
+        return job
+
+    async def run_job(self, job: CrawlJob):
+        """
+        Run a job's crawl on the shared runtime
+        """
+        def on_start(pipeline: CrawlPipeline):
+            job.pipeline = pipeline
+            if job.state == "stopping":
+                pipeline.request_stop("cancelled")
+
+        options = dict(job.options)
+        options.setdefault("cache_file", self.cache_file)
+        num_workers = options.pop("num_workers", 2)
+        try:
+            job.stats = await run_pipeline(job.start_url, job.out_file, num_workers,
+                                           runtime=self.runtime,
+                                           handle_signals=False,
+                                           on_start=on_start,
+                                           **options)
+            job.state = "cancelled" if job.state == "stopping" else "done"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.state = "failed"
+        finally:
+            if job.pipeline:
+                job.collected_pages = job.pipeline.frontier.collected_pages
+            job.pipeline = None # the frontier, link graph and stage queues are not needed anymore
+
+    async def submit(self, request: web.Request) -> web.Response:
+        """
+        Validate and start a new job
+        """
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(reason="body must be JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(reason="body must be a JSON object")
+        start_url = body.pop("start_url", None)
+        if not isinstance(start_url, str) or not start_url:
+            raise web.HTTPBadRequest(reason="start_url is required")
+        unknown = set(body) - set(JOB_OPTIONS)
+        if unknown:
+            raise web.HTTPBadRequest(reason=f"unknown options: {sorted(unknown)}")
+        for name, value in body.items():
+            error = option_error(name, value)
+            if error:
+                raise web.HTTPBadRequest(reason=error)
+
+        job_id = uuid.uuid4().hex[:12]
+        out_file = body.pop("out_file", None) or str(Path(self.out_dir) / f"{job_id}.jsonl")
+        job = CrawlJob(job_id, start_url, out_file, body)
+        self.jobs[job_id] = job
+        job.task = asyncio.create_task(self.run_job(job))
+        logger.info(f"Job {job_id} submitted: {start_url}")
+        return web.json_response(job.status(), status=201)
+
+    async def list_jobs(self, request: web.Request) -> web.Response:
+        """
+        Status of all jobs
+        """
+        return web.json_response([job.status() for job in self.jobs.values()])
+
+    async def get_status(self, request: web.Request) -> web.Response:
+        """
+        Status of one job
+        """
+        return web.json_response(self.get_job(request).status())
+
+    async def cancel(self, request: web.Request) -> web.Response:
+        """
+        Request a graceful stop of a job
+        """
+        job = self.get_job(request)
+        job.cancel()
+        return web.json_response(job.status(), status=202)
+
+    async def stream_results(self, request: web.Request) -> web.StreamResponse:
+        """
+        Stream the documents written by a job, following the output until the job finishes
+        """
+        job = self.get_job(request)
+        resp = web.StreamResponse(headers={"Content-Type":"application/x-ndjson"})
+        await resp.prepare(request)
+        offset = job.out_offset
+        while (True):
+            finished = job.finished
+            data, offset = await asyncio.to_thread(read_lines_from, job.out_file, offset)
+            if data:
+                await resp.write(data)
+            if finished:
+                break
+            await asyncio.sleep(0.5)
+        await resp.write_eof()
+        return resp
+
+    async def shutdown(self):
+        """
+        Drain all running jobs and release the shared runtime
+        """
+        for job in self.jobs.values():
+            job.cancel()
+        tasks = [job.task for job in self.jobs.values() if job.task]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.runtime.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path: str = None):
+        """
+        Serve the job API until SIGTERM/SIGINT, then shut down gracefully
+        """
+        runner = web.AppRunner(self.make_app())
+        await runner.setup()
+        if socket_path:
+            site = web.UnixSite(runner, socket_path)
+            where = socket_path
+        else:
+            site = web.TCPSite(runner, host, port)
+            where = f"http://{host}:{port}"
+        await site.start()
+        logger.info(f"Crawl daemon listening on {where}")
+
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                ...
+        try:
+            await stop.wait()
+        finally:
+            logger.info("Crawl daemon shutting down")
+            await self.shutdown()
+            await runner.cleanup()
@@ -0,0 +1,101 @@
+import json
+import hashlib
+import threading
+from pathlib import Path
+
+class BoilerplateTable:
+    """
+    Per-host frequency table of text block fingerprints.
+    A block whose fingerprint appears on more than `max_share` of a host's pages
+    (disclaimers, CTAs, sidebar paragraphs) is treated as boilerplate.
+    Decisions start once `min_pages` pages of the host were seen.
+    """
+    def __init__(self, max_share: float = 0.5, min_pages: int = 20, max_blocks: int = 200000):
+        self.max_share = max_share
+        self.min_pages = min_pages
+        self.max_blocks = max_blocks # per host, before rare fingerprints are pruned
+        self.hosts = {} # host -> {"pages": int, "counts": {fingerprint: pages}}
+        self.dropped = 0
+        self.lock = threading.Lock() # extract_page runs in threads
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        """
+        Hash of a block's case- and whitespace-normalized text
+        """
+        norm = " ".join(text.lower().split())
+        return hashlib.blake2b(norm.encode("utf-8"), digest_size=8).hexdigest()
+
+    def filter_blocks(self, host: str, blocks: list[dict], max_share: float = None) -> list[dict]:
+        """
+        Record the blocks of a new page and return the ones that are not boilerplate.
+        `max_share` overrides the table's share for this call
+        """
+        if max_share is None:
+            max_share = self.max_share
+        fps = [self.fingerprint(b["text"]) for b in blocks]
+        with self.lock:
+            entry = self.hosts.setdefault(host, {"pages":0, "counts":{}})
+            counts = entry["counts"]
+            entry["pages"] += 1
+            for fp in set(fps):
+                counts[fp] = counts.get(fp, 0) + 1
+            if len(counts) > self.max_blocks:
+                self.prune(counts)
+
+            pages = entry["pages"]
+            if pages < self.min_pages:
+                return blocks
+            limit = max_share * pages
+            out_blocks = [b for b, fp in zip(blocks, fps) if counts.get(fp, 0) <= limit]
+            self.dropped += len(blocks) - len(out_blocks)
+        return out_blocks
+
+    @staticmethod
+    def prune(counts: dict):
+        """
+        Forget fingerprints seen on a single page
+        """
+        for fp in [fp for fp, n in counts.items() if n <= 1]:
+            del counts[fp]
+
+    def load(self, file_path: str):
+        """
+        Load a table saved by a previous run
+        """
+        path = Path(file_path)
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            self.hosts = json.load(f)
+
+    def save(self, file_path: str):
+        """
+        Persist the table next to the page cache
+        """
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with self.lock:
+            tmp_path.write_text(json.dumps(self.hosts), encoding="utf-8")
+            tmp_path.replace(path)
+
+class BoilerplateFilter:
+    """
+    One crawl's use of a BoilerplateTable shared by the crawls of a process:
+    the crawl's own `max_share` and its count of dropped blocks
+    """
+    def __init__(self, table: BoilerplateTable, max_share: float):
+        self.table = table
+        self.max_share = max_share
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def filter_blocks(self, host: str, blocks: list[dict]) -> list[dict]:
+        """
+        Record the blocks of a new page and return the ones that are not boilerplate
+        """
+        out_blocks = self.table.filter_blocks(host, blocks, self.max_share)
+        with self.lock:
+            self.dropped += len(blocks) - len(out_blocks)
+        return out_blocks
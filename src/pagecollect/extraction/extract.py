@@ -1,10 +1,37 @@
-import langdetect
+import hashlib
 from datetime import datetime, timezone
-from pagecollect.extraction.parse import parse_page
+from pagecollect.extraction.parse import parse_page, parse_links, make_soup
+from pagecollect.extraction.prescan import may_have_content
 from pagecollect.extraction.transform import build_page_info
 from pagecollect.extraction import url_filter, content_filter
+from pagecollect.extraction import lang_util
 from pagecollect.extraction.lang_util import get_text_lang
 from urllib.parse import urlparse
+from pagecollect.extraction.boilerplate import BoilerplateFilter
+from pagecollect.extraction.url_util import get_normalized_host
+from pagecollect.tracing import TaskTrace, span
+
+def source_hash(title: str | None, content_text: str) -> str:
+    """
+    Hash of a page's title and content text, computed like the writer's
+    `content_hash` of a document
+    """
+    text = (title or "") + "\n" + content_text
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+def kept_without_boilerplate(parsed_blocks: list[dict], blocks: list[dict],
+                             kept_blocks: list[dict]) -> list[dict]:
+    """
+    The blocks the content filter would keep if no boilerplate had been dropped.
+    `blocks` are the parsed blocks left by the boilerplate filter and `kept_blocks`
+    what the content filter kept of them; only the dropped blocks are filtered again
+    """
+    if len(blocks) == len(parsed_blocks):
+        return kept_blocks
+    left = {id(b) for b in blocks}
+    _, kept_dropped = content_filter.filter_blocks([b for b in parsed_blocks if id(b) not in left])
+    kept = {id(b) for b in kept_blocks} | {id(b) for b in kept_dropped}
+    return [b for b in parsed_blocks if id(b) in kept]
 
 def calc_word_count(text: str):
     """
@@ -43,6 +70,14 @@ def make_content_text(blocks: list):
     out_text = "\n".join(text_lst)
     return out_text
 
+def warm_up():
+    """
+    Load the lazily imported extraction dependencies (bs4, lxml, langdetect profiles).
+    Blocking; meant to run in a thread during startup
+    """
+    make_soup("<html><body><p>warm up</p></body></html>")
+    lang_util.warm_up()
+
 def infer_page_type(page_url, page_type_rules):
     """
     Infer page type from URL path rules.
@@ -56,35 +91,66 @@ def infer_page_type(page_url, page_type_rules):
                 return rule["type"]
     return None
 
-def extract_page(html: str, url: str, rules: dict) -> dict:
+def extract_page(html: str, url: str, rules: dict, boilerplate: BoilerplateFilter = None,
+                 trace: TaskTrace = None) -> dict:
     """
-    End-to-end page extraction
+    End-to-end page extraction.
+    A cheap pre-scan first rejects pages that cannot have a long paragraph;
+    for those only the links are parsed.
+    With a boilerplate table, blocks repeated across the host's pages are
+    dropped before filtering (and language detection).
+    A page with a document gets as "content_hash" the `source_hash` of the content text
+    it would have without boilerplate removal, so the hash does not change as the
+    boilerplate table learns
     """
-    parsed_page = parse_page(html)
-    page_info = build_page_info(parsed_page, url)
+    with span(trace, "prescan"):
+        has_candidates = may_have_content(html)
+    if not has_candidates:
+        with span(trace, "parse links"):
+            parsed_page = parse_links(html)
+            page_info = build_page_info(parsed_page, url)
+        return {
+            "doc":None,
+            "inner_links":filter_inner_links(page_info["inner_links"], rules.get("urls")),
+            "prescan_rejected":True
+        }
+
+    with span(trace, "parse"):
+        parsed_page = parse_page(html, rules.get("content"))
+        page_info = build_page_info(parsed_page, url)
     blocks = page_info["blocks"]
+    parsed_blocks = blocks
+    with span(trace, "filter", blocks=len(blocks)):
+        if boilerplate:
+            blocks = boilerplate.filter_blocks(get_normalized_host(url), blocks)
+        has_content, kept_blocks = content_filter.filter_blocks(blocks)
     doc = None
-    has_content, kept_blocks = content_filter.filter_blocks(blocks)
     if has_content:
-        content_text = make_content_text(kept_blocks)
-        page_type = infer_page_type(url, rules.get("page_types"))
-        doc = {
-            "url":url,
-            "title":page_info["title"],
-            "content_text":content_text,
-            "page_type":page_type,
-            "parent_url":None,
-            "meta":{
-                "language":get_text_lang(content_text),
-                "word_count":calc_word_count(content_text),
-                "char_count":len(content_text),
-                "fetched_at":now_utc_iso()
+        with span(trace, "make doc"):
+            content_text = make_content_text(kept_blocks)
+            page_type = infer_page_type(url, rules.get("page_types"))
+            doc = {
+                "url":url,
+                "title":page_info["title"],
+                "content_text":content_text,
+                "page_type":page_type,
+                "parent_url":None,
+                "meta":{
+                    "language":get_text_lang(content_text),
+                    "word_count":calc_word_count(content_text),
+                    "char_count":len(content_text),
+                    "fetched_at":now_utc_iso()
+                }
             }
-        }
+    page_hash = None
+    if doc:
+        source_blocks = kept_without_boilerplate(parsed_blocks, blocks, kept_blocks)
+        page_hash = source_hash(page_info["title"], make_content_text(source_blocks))
     inner_links = page_info["inner_links"]
     inner_links_to_keep = filter_inner_links(inner_links, rules.get("urls"))
     out_page = {
         "doc":doc,
-        "inner_links":inner_links_to_keep
+        "inner_links":inner_links_to_keep,
+        "content_hash":page_hash
     }
     return out_page
\ No newline at end of file
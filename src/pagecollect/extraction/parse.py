@@ -1,4 +1,4 @@
-from bs4 import BeautifulSoup
+import re
 
 # Containers that typically contain navigation or boilerplate content
 NOISE_PARENTS = {"nav", "header", "footer", "aside"}
@@ -6,16 +6,23 @@ NOISE_PARENTS = {"nav", "header", "footer", "aside"}
 # Tags considered as potential “content blocks”
 TAGS = ["h1", "h2", "h3", "p", "li", "blockquote", "pre", "code"]
 
-def make_soup(html: str) -> BeautifulSoup:
+# A content-root selector that is a bare tag name can be used for partial parsing
+TAG_NAME_RE = re.compile(r"^[a-z][a-z0-9]*$")
+
+def make_soup(html: str, parse_only: list[str] = None) -> "BeautifulSoup":
     """
     Create a BeautifulSoup object from raw HTML.
     Prefer the fast and robust `lxml` parser.
     Fall back to `html5lib` if parsing fails.
+    With `parse_only`, only those tags (and their subtrees) are built.
+    bs4 is imported on first use to keep CLI startup fast.
     """
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer(parse_only) if parse_only else None
     try:
-        return BeautifulSoup(html, "lxml")
+        return BeautifulSoup(html, "lxml", parse_only=strainer)
     except Exception:
-        return BeautifulSoup(html, "html5lib")
+        return BeautifulSoup(html, "html5lib", parse_only=strainer)
 
 def get_stripped_text(el):
     """
@@ -42,12 +49,27 @@ def is_in_noise_container(el):
             return True
     return False
 
-def get_blocks(soup):
+def find_content_root(soup, root_selectors: list[str]):
+    """
+    Return the element of the first content-root selector that matches,
+    or None if none does.
+    Matches inside a noise container (e.g. a teaser <article> in <nav>) are skipped
+    """
+    for selector in root_selectors:
+        for root in soup.select(selector):
+            if not is_in_noise_container(root):
+                return root
+    return None
+
+def get_blocks(soup, root=None):
     """
-    Extract textual content blocks from the page body.
+    Extract textual content blocks from the page body,
+    or from the `root` element if given.
     """
+    if root is None:
+        root = soup.body
     blocks = []
-    for el in soup.body.find_all(TAGS):
+    for el in root.find_all(TAGS):
         if is_in_noise_container(el):
             continue
         text = None
@@ -65,12 +87,14 @@ def get_blocks(soup):
         )
     return blocks
 
-def get_links(soup):
+def get_links(soup, anchors=None):
     """
     Extract all anchor links from the page body
     """
     links = []
-    for a in soup.body.find_all("a", href=True):
+    if anchors is None:
+        anchors = soup.body.find_all("a", href=True)
+    for a in anchors:
         href = a["href"].strip()
         if not href:
             continue
@@ -83,14 +107,58 @@ def get_links(soup):
         )
     return links
 
-def parse_page(html: str):
+def parse_links(html: str):
     """
-    Parse raw HTML into a page representation
+    Light parse that only builds the <a href> elements of the page.
+    Used for pages that cannot yield a document
     """
-    soup = make_soup(html)
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer("a", href=True)
+    try:
+        soup = BeautifulSoup(html, "lxml", parse_only=strainer)
+    except Exception:
+        soup = BeautifulSoup(html, "html5lib", parse_only=strainer)
+    output = {
+        "title":None,
+        "blocks":[],
+        "links":get_links(soup, soup.find_all("a", href=True))
+    }
+    return output
+
+def parse_page(html: str, content_rules: dict = None):
+    """
+    Parse raw HTML into a page representation.
+    With host content rules:
+    - blocks are only taken from the first element matching a "root" selector
+      (the whole body if none matches), minus the subtrees matching an "exclude" selector
+    - if every root selector is a tag name, only the roots, noise containers, links
+      and title are parsed; the noise containers tell which roots to skip
+    Links are always collected from the full page.
+    """
+    content_rules = content_rules or {}
+    root_selectors = content_rules.get("root") or []
+    exclude_selectors = content_rules.get("exclude") or []
+
+    soup = None
+    root = None
+    anchors = None
+    if root_selectors and all(TAG_NAME_RE.match(s) for s in root_selectors):
+        soup = make_soup(html, parse_only=root_selectors + sorted(NOISE_PARENTS) + ["a", "title"])
+        root = find_content_root(soup, root_selectors)
+        if root is None:
+            soup = None # no root on this page: parse it fully
+        else:
+            anchors = soup.find_all("a", href=True)
+    if soup is None:
+        soup = make_soup(html)
+        root = find_content_root(soup, root_selectors) or soup.body
+
     title = get_title(soup)
-    blocks = get_blocks(soup)
-    links = get_links(soup)
+    links = get_links(soup, anchors)
+    for selector in exclude_selectors:
+        for el in root.select(selector):
+            el.decompose()
+    blocks = get_blocks(soup, root)
     output = {
         "title":title,
         "blocks":blocks,
@@ -0,0 +1,87 @@
+import re
+from html import unescape
+from pagecollect.extraction.content_filter import MIN_WORDS
+from pagecollect.extraction.transform import PARAGRAPH_TAGS
+
+# Markup tokens: skipped script/style bodies, comments/CDATA, and tags
+TOKEN_RE = re.compile(
+    r"<(script|style)\b.*?</\1\s*>"
+    r"|<!--.*?-->"
+    r"|<!\[CDATA\[.*?\]\]>"
+    r"|<(/?)([a-zA-Z][a-zA-Z0-9:-]*)[^>]*>",
+    re.S | re.I
+)
+
+# Scripts where the paragraph threshold is measured in characters
+CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+def scan_text_blocks(html: str) -> dict:
+    """
+    Single-pass scan of raw HTML, without building a tree.
+    Track the text inside every open paragraph-like element (p, blockquote, pre, code)
+    and report:
+    - longest_run: largest word count of such an element
+    - text_density: share of the HTML that is text (of the scanned part; the scan
+      stops at the first block that may be long enough)
+    - may_have_content: whether a block could reach MIN_WORDS
+    The counts are upper bounds of what the parser sees (unclosed elements run to
+    the end of the page, implicit closing is ignored), so a page is only rejected
+    when it certainly has no long paragraph.
+    """
+    open_blocks = [] # [tag, words, chars, has_cjk] of the open candidate elements
+    longest_run = 0
+    text_chars = 0
+    pos = 0
+
+    def add_text(text):
+        nonlocal longest_run, text_chars
+        text = unescape(text)
+        text_chars += len(text.strip())
+        if not open_blocks:
+            return False
+        words = len(text.split())
+        has_cjk = CJK_RE.search(text) is not None
+        for blk in open_blocks:
+            blk[1] += words
+            blk[2] += len(text) + 1 # a tag boundary adds at most one separator
+            blk[3] = blk[3] or has_cjk
+            longest_run = max(longest_run, blk[1])
+            if blk[1] >= MIN_WORDS or (blk[3] and blk[2] >= MIN_WORDS):
+                return True
+        return False
+
+    found = False
+    for m in TOKEN_RE.finditer(html):
+        if m.start() > pos and add_text(html[pos:m.start()]):
+            found = True
+            break
+        pos = m.end()
+        tag = m.group(3)
+        if not tag:
+            continue
+        tag = tag.lower()
+        if tag not in PARAGRAPH_TAGS:
+            continue
+        if not m.group(2):
+            open_blocks.append([tag, 0, 0, False])
+            continue
+        # close the innermost open element with this name
+        for i in range(len(open_blocks) - 1, -1, -1):
+            if open_blocks[i][0] == tag:
+                del open_blocks[i]
+                break
+    else:
+        if pos < len(html) and add_text(html[pos:]):
+            found = True
+
+    return {
+        "may_have_content":found,
+        "longest_run":longest_run,
+        "text_density":text_chars / len(html) if html else 0.0
+    }
+
+def may_have_content(html: str) -> bool:
+    """
+    Cheap test run before parsing: False means the page cannot yield a document
+    """
+    return scan_text_blocks(html)["may_have_content"]
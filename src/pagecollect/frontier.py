@@ -1,6 +1,9 @@
 import asyncio
+import itertools
+import math
 from dataclasses import dataclass
 import logging
+from typing import Callable
 
 logger = logging.getLogger(__name__)
 
@@ -12,50 +15,196 @@ class Task:
     url: str
     depth: int
     parent_url: str
+    attempt: int = 0 # failed fetch attempts so far
+
+class PageTypeBudget:
+    """
+    Per page type document quotas, set in the host page_types rules:
+    - "quota": maximum number of documents of the type
+    - "weight": share of max_pages for the type
+    The type of a URL is inferred from the URL alone, so a saturated type
+    is known before its pages are fetched. Types without a quota are only
+    bound by max_pages.
+    """
+    def __init__(self, page_type_fn: Callable[[str], str | None], quotas: dict[str, int]):
+        self.page_type_fn = page_type_fn
+        self.quotas = quotas
+        self.collected = {} # page type -> documents collected
+        self.skipped = {}   # page type -> URLs not fetched because the quota was reached
+
+    @staticmethod
+    def quotas_from_rules(page_type_rules: list[dict], max_pages: int = None) -> dict[str, int]:
+        """
+        Document quota of every page type that has one
+        """
+        quotas = {}
+        for rule in page_type_rules or []:
+            quota = rule.get("quota")
+            weight = rule.get("weight")
+            if weight is not None and max_pages is not None:
+                weight_quota = math.ceil(weight * max_pages)
+                quota = weight_quota if quota is None else min(quota, weight_quota)
+            if quota is not None and rule["type"] not in quotas:
+                quotas[rule["type"]] = quota
+        return quotas
+
+    def saturated(self, url: str) -> bool:
+        """
+        Whether the quota of the URL's page type is reached
+        """
+        page_type = self.page_type_fn(url)
+        quota = self.quotas.get(page_type)
+        return quota is not None and self.collected.get(page_type, 0) >= quota
+
+    def skip(self, url: str):
+        """
+        Count a URL dropped because its page type is saturated
+        """
+        page_type = self.page_type_fn(url)
+        self.skipped[page_type] = self.skipped.get(page_type, 0) + 1
+
+    def mark_collected(self, url: str):
+        """
+        Count a document of the URL's page type
+        """
+        page_type = self.page_type_fn(url)
+        count = self.collected.get(page_type, 0) + 1
+        self.collected[page_type] = count
+        if count == self.quotas.get(page_type):
+            logger.info(f"Quota {count} reached for page type {page_type}")
+
+    def stats(self) -> dict:
+        """
+        Documents collected and URLs skipped per page type ("other" for untyped pages)
+        """
+        page_types = set(self.collected) | set(self.quotas)
+        return {
+            page_type or "other":{
+                "collected":self.collected.get(page_type, 0),
+                "quota":self.quotas.get(page_type),
+                "skipped":self.skipped.get(page_type, 0)
+            }
+            for page_type in page_types
+        }
 
 class TaskQueue:
     """
     Frontier queue for scrape tasks with budget control.
+    With a `priority` function (url -> score), higher scored URLs are dequeued first;
+    otherwise the order is FIFO.
+    With a `page_budget`, URLs of page types that reached their quota are dropped
+    (and marked as seen, so each is counted once).
     """
-    def __init__(self, max_pages: int = None, max_depth: int = None):
-        self.queue = asyncio.Queue()
+    def __init__(self, max_pages: int = None, max_depth: int = None,
+                 priority: Callable[[str], float] = None, page_budget: PageTypeBudget = None):
+        self.priority = priority
+        self.page_budget = page_budget
+        self.seq = itertools.count() # FIFO among equal scores
+        self.queue = asyncio.PriorityQueue() if priority else asyncio.Queue()
         self.seen = set() # url already seen
         self.max_pages = max_pages
         self.max_depth = max_depth
         self.collected_pages = 0
         self.out_of_budget = False
     
-    def mark_collected(self):
+    def mark_collected(self, url: str = None):
         """
         Increment the count of successfully collected pages.
         """
         self.collected_pages += 1
+        if self.page_budget and url:
+            self.page_budget.mark_collected(url)
 
-    async def put(self, task: Task):
+    def over_quota(self, url: str) -> bool:
         """
-        Enqueue a new task
+        Check whether the page type of the URL reached its quota;
+        if so the URL counts as skipped
+        """
+        if self.page_budget is None or not self.page_budget.saturated(url):
+            return False
+        self.page_budget.skip(url)
+        return True
+
+    async def put(self, task: Task) -> bool:
+        """
+        Enqueue a new task.
+        Return True if it was enqueued
         """
         if task.url in self.seen:
-            return
+            return False
         if self.max_pages is not None and self.collected_pages >= self.max_pages:
             if not self.out_of_budget:
                 self.out_of_budget = True
                 logger.info(f"Max Pages {self.max_pages} collected; Stopping")
         
-            return
+            return False
         if self.max_depth is not None and task.depth > self.max_depth:
             if not self.out_of_budget:
                 self.out_of_budget = True
                 logger.info(f"URL depth is greater than Max Depth {self.max_depth}; Stopping")
-            return
+            return False
         self.seen.add(task.url)
-        await self.queue.put(task)
+        if self.over_quota(task.url):
+            return False
+        self.put_task(task)
+        return True
+
+    def put_task(self, task: Task):
+        """
+        Add a task to the underlying queue, bypassing the budget checks
+        """
+        if self.priority:
+            self.queue.put_nowait((-self.priority(task.url), next(self.seq), task))
+        else:
+            self.queue.put_nowait(task)
+
+    def rescore(self):
+        """
+        Recompute the priority of every queued task (scores change as in-links are found);
+        the discovery order still breaks ties
+        """
+        if not self.priority:
+            return
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        for _, seq, task in items:
+            self.queue.put_nowait((-self.priority(task.url), seq, task))
+            self.queue.task_done() # the entry keeps its unfinished slot
+
+    def requeue(self, task: Task):
+        """
+        Put back a task that was already dequeued (e.g. a delayed retry).
+        The new entry takes over the unfinished slot of the dequeued one
+        """
+        self.put_task(task)
+        self.queue.task_done()
     
     async def get(self) -> Task:
         """
         Dequeue the next task
         """
-        return await self.queue.get()
+        item = await self.queue.get()
+        if self.priority:
+            return item[2]
+        return item
+
+    def take_pending(self) -> list[Task]:
+        """
+        Remove and return all queued tasks, marking them done
+        """
+        tasks = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            tasks.append(item[2] if self.priority else item)
+            self.queue.task_done()
+        return tasks
+
+    def qsize(self) -> int:
+        """
+        Number of tasks waiting in the queue
+        """
+        return self.queue.qsize()
 
     def task_done(self):
         """
@@ -67,4 +216,70 @@ class TaskQueue:
         """
         Block until all enqueued tasks have been processed.
         """
-        await self.queue.join()
\ No newline at end of file
+        await self.queue.join()
+
+class StageQueue:
+    """
+    Bounded queue between two pipeline stages.
+    A full queue blocks its producers, which is how backpressure
+    flows from a slow stage back to the stages feeding it.
+    """
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.peak_size = 0
+        self.blocked_time = 0.0 # seconds producers spent waiting on a full queue
+
+    async def put(self, item):
+        """
+        Enqueue an item, waiting while the queue is full
+        """
+        if self.queue.full():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await self.queue.put(item)
+            self.blocked_time += loop.time() - start
+        else:
+            self.queue.put_nowait(item)
+        self.peak_size = max(self.peak_size, self.queue.qsize())
+
+    async def get(self):
+        """
+        Dequeue the next item
+        """
+        return await self.queue.get()
+
+    def task_done(self):
+        """
+        Signal that a previously dequeued item has been handed off
+        """
+        self.queue.task_done()
+
+    async def join(self):
+        """
+        Block until every dequeued item has been handed off
+        """
+        await self.queue.join()
+
+    def full(self) -> bool:
+        """
+        Whether producers would block on the next put
+        """
+        return self.queue.full()
+
+    def occupancy(self) -> str:
+        """
+        Current occupancy, e.g. "3/16"
+        """
+        return f"{self.queue.qsize()}/{self.queue.maxsize}"
+
+    def stats(self) -> dict:
+        """
+        Occupancy statistics of the queue
+        """
+        return {
+            "size":self.queue.qsize(),
+            "maxsize":self.queue.maxsize,
+            "peak_size":self.peak_size,
+            "blocked_time":round(self.blocked_time, 3)
+        }
@@ -1,97 +1,68 @@
 import logging
 from pathlib import Path
 import asyncio
-from aiohttp import ClientSession
+import signal
+import time
 from asyncio import CancelledError
+from functools import lru_cache
+from urllib.parse import urlparse
+from typing import Callable
 
 from pagecollect.context import WorkerContext
-from pagecollect.frontier import Task, TaskQueue
-from pagecollect.crawl.fetch import fetch_page
-from pagecollect.extraction.extract import extract_page
-from pagecollect.storage.json_writer import JsonWriter
+from pagecollect.frontier import Task, TaskQueue, StageQueue, PageTypeBudget
+from pagecollect.crawl.fetch import fetch_page, TemporaryFetchError, PageGoneError, FetchError
+from pagecollect.crawl.retry import RetryScheduler, CircuitBreaker
+from pagecollect.extraction.extract import extract_page, infer_page_type, warm_up
+from pagecollect.storage.json_writer import JsonWriter, content_hash
 from pagecollect.crawl.robots import RobotsPolicy
 from pagecollect.storage.page_cache import PageCache
+from pagecollect.storage.link_graph import LinkGraph
+from pagecollect.crawl.concurrency import ConcurrencyController
 from pagecollect.extraction.transform import normalize_url
 from pagecollect.storage.file_util import read_json
+from pagecollect.storage.checkpoint import save_checkpoint, load_checkpoint
+from pagecollect.extraction.boilerplate import BoilerplateTable, BoilerplateFilter
 from pagecollect.extraction.url_util import get_normalized_host
+from pagecollect.startup import StartupReport
+from pagecollect.tracing import Tracer, TaskTrace, span, make_trace_config
 
 logger = logging.getLogger(__name__)
 
+RULES_DIR = Path(__file__).parent / "rules"
+
 def make_page_meta(url: str, out_page: dict) -> dict:
     """
     Build the minimal metadata stored in PageCache.
     """
     page_meta = {
         "url": url,
-        "inner_links": out_page["inner_links"]
+        "inner_links": out_page["inner_links"],
+        "content_hash": out_page.get("content_hash") or content_hash(out_page["doc"])
     }
     return page_meta
 
-async def pipeline_worker(queue: TaskQueue, worker_context: WorkerContext, writer: JsonWriter):
-    """
-    Main workflow for a scrape worker
-    """
-    while (True):
-        task = await queue.get()
-        try:
-            if queue.out_of_budget:
-                continue
-
-            inner_links = []
-            if worker_context.page_cache.exists_page(task.url):
-                #logger.info(f"Use cache, {task.url}")
-                inner_links = worker_context.page_cache.get_inner_links(task.url)
-            else:
-                #logger.info(f"Fetching {task.url}")
-                html = await fetch_page(task.url, worker_context)
-                if html is None:
-                    continue
-                out_page = extract_page(html, task.url, worker_context.rules)
-                page_meta = make_page_meta(task.url, out_page)
-                await worker_context.page_cache.write(page_meta)
-                doc = out_page["doc"]
-                if doc:
-                    doc["parent_url"] = task.parent_url
-                    #logger.info(f"Writing documents, {task.url}")
-                    await writer.write(doc)
-                    queue.mark_collected()
-                    if queue.collected_pages % 10 == 0:
-                        logger.info(f"{queue.collected_pages} documents collected")
-                else:
-                    logger.info(f"No document from {task.url}")
-                                
-                inner_links = out_page["inner_links"]
-
-            for lnk in inner_links:
-                if not await worker_context.robots_policy.allowed(lnk):
-                    continue
-                new_task = Task(lnk, task.depth + 1, task.url)
-                await queue.put(new_task)
-            
-        except CancelledError:
-            raise
-        except Exception as e:
-            logger.error(f"Process Task failed, {task.url}, error: {e}")
-            continue
-        finally:
-            queue.task_done()
-
 def load_rules(url: str) -> dict:
     """
     Load site-specific extraction and URL rules based on host
     """
-    host = get_normalized_host(url)
+    return compile_rules(get_normalized_host(url))
 
+@lru_cache(maxsize=None)
+def compile_rules(host: str) -> dict:
+    """
+    Read and prepare the rules of a host once per process.
+    The result is shared and must be treated as read-only
+    """
     def _load(rule_name, cfg_name=None):
-        rule_path = Path(f"src/pagecollect/rules/{rule_name}/{cfg_name}.json")
+        rule_path = RULES_DIR / rule_name / f"{cfg_name}.json"
         rules = None
-        if rule_path:
+        if rule_path.exists():
             rules = read_json(rule_path)
         return rules
     
     rule_dict = {}
 
-    page_type_rules = _load("page_types", host)
+    page_type_rules = _load("page_types", host) or []
     page_type_rules.sort(key=lambda r: len(r["match"]), reverse=True)
     rule_dict["page_types"] = page_type_rules
     
@@ -99,54 +70,720 @@ def load_rules(url: str) -> dict:
     if not host_url_rule:
         host_url_rule = _load("urls", "default")
     rule_dict["urls"] = host_url_rule
+
+    rule_dict["content"] = _load("content", host)
     
     return rule_dict
 
+class CrawlPipeline:
+    """
+    Staged crawl: fetch -> extract -> write, connected by bounded queues.
+    - Fetchers are resized by the concurrency controller
+    - Extractors run `extract_page` in threads, off the event loop
+    - Writers append to the page cache and output, then enqueue the page links
+    A frontier task stays unfinished until the last stage handling it is done,
+    so `TaskQueue.join` still means the whole crawl is finished.
+    """
+    def __init__(self, frontier: TaskQueue,
+                 worker_context: WorkerContext,
+                 writer: JsonWriter,
+                 extract_workers: int = 1,
+                 write_workers: int = 1,
+                 queue_size: int = 16,
+                 refresh_urls: set = None,
+                 retry_scheduler: RetryScheduler = None,
+                 circuit_breaker: CircuitBreaker = None,
+                 boilerplate: BoilerplateFilter = None,
+                 tracer: Tracer = None
+                 ):
+        self.frontier = frontier
+        self.worker_context = worker_context
+        self.writer = writer
+        self.extract_workers = max(extract_workers, 1)
+        self.write_workers = max(write_workers, 1)
+        self.extract_queue = StageQueue("extract", max(queue_size, 1))
+        self.write_queue = StageQueue("write", max(queue_size, 1))
+        self.refresh_urls = refresh_urls or set() # cached pages to fetch again
+        # an empty RetryScheduler is falsy (it has a length)
+        self.retry_scheduler = retry_scheduler if retry_scheduler is not None else RetryScheduler()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.boilerplate = boilerplate
+        self.tracer = tracer
+        self.retry_added = asyncio.Event()
+        self.gave_up = 0
+        self.prescan_rejected = 0 # pages that skipped the full parse
+        self.stopping = asyncio.Event()
+        self.stop_reason = None
+        self.fetcher_lst = []
+        self.idle_fetchers = set() # fetchers waiting on the frontier; safe to cancel
+        self.worker_lst = []
+        self.in_flight = {} # id -> task dequeued from the frontier and not finished (nor deferred)
+        self.unfinished = [] # in-flight tasks when the workers were cancelled
+
+    async def enqueue_links(self, task: Task, inner_links: list[str]):
+        """
+        Add the allowed links of a processed page to the frontier
+        """
+        for lnk in inner_links:
+            if lnk in self.frontier.seen:
+                continue
+            if not await self.worker_context.robots_policy.allowed(lnk):
+                continue
+            new_task = Task(lnk, task.depth + 1, task.url)
+            enqueued = await self.frontier.put(new_task)
+            if self.tracer and enqueued:
+                self.tracer.enqueued(lnk)
+
+    def trace_of(self, task: Task) -> TaskTrace | None:
+        """
+        Trace of a task, None if it is not traced
+        """
+        if self.tracer is None:
+            return None
+        return self.tracer.get(task.url)
+
+    def task_done(self, task: Task):
+        """
+        Release the frontier slot of a task whose processing is over
+        """
+        self.in_flight.pop(id(task), None)
+        self.frontier.task_done()
+        trace = self.trace_of(task)
+        if trace:
+            trace.finish(attempts=task.attempt + 1)
+
+    def defer(self, task: Task, delay: float, reason: str = "retry backoff"):
+        """
+        Park a dequeued task in the retry queue; it keeps its unfinished frontier slot
+        """
+        due = asyncio.get_running_loop().time() + delay
+        self.in_flight.pop(id(task), None)
+        self.retry_scheduler.schedule(task, due)
+        self.retry_added.set()
+        trace = self.trace_of(task)
+        if trace:
+            trace.wait(reason)
+
+    async def retry_pump(self):
+        """
+        Move due retries back into the frontier
+        """
+        loop = asyncio.get_running_loop()
+        while (True):
+            self.retry_added.clear()
+            for task in self.retry_scheduler.pop_due(loop.time()):
+                self.frontier.requeue(task)
+                trace = self.trace_of(task)
+                if trace:
+                    trace.wait("frontier wait")
+            next_due = self.retry_scheduler.next_due()
+            timeout = None if next_due is None else max(next_due - loop.time(), 0)
+            try:
+                await asyncio.wait_for(self.retry_added.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def fetch_task(self, task: Task) -> bool:
+        """
+        Fetch a task and hand the HTML to the extractors.
+        Hosts with an open circuit and temporary failures send the task
+        to the retry queue instead of blocking the worker.
+        Return True if the task was handed off (to the extractors or the retry queue)
+        """
+        loop = asyncio.get_running_loop()
+        host = urlparse(task.url).netloc
+        wait = self.circuit_breaker.wait_time(host, loop.time())
+        if wait > 0:
+            self.defer(task, wait, reason="circuit open")
+            return True
+        # a request let through while the host is probing is the probe
+        probe = host in self.circuit_breaker.probing
+
+        trace = self.trace_of(task)
+        try:
+            html = await fetch_page(task.url, self.worker_context, trace=trace)
+        except PageGoneError:
+            self.circuit_breaker.record_success(host, task.url)
+            if self.writer.change_feed and self.worker_context.page_cache.get_content_hash(task.url):
+                # the page had a document: let the writer record the delete
+                if trace:
+                    trace.wait("write queue")
+                await self.write_queue.put((task, {"doc":None, "inner_links":[], "gone":True}))
+                return True
+            return False
+        except TemporaryFetchError as e:
+            self.circuit_breaker.record_failure(host, task.url, loop.time())
+            task.attempt += 1
+            if task.attempt >= self.retry_scheduler.max_attempts:
+                logger.warning(f"Give up {task.url} after {task.attempt} attempts: {e}")
+                self.gave_up += 1
+                return False
+            self.defer(task, self.retry_scheduler.backoff(task.attempt))
+            return True
+        except FetchError:
+            return False
+        finally:
+            if probe:
+                self.circuit_breaker.end_probe(host) # no-op once the outcome was recorded
+
+        self.circuit_breaker.record_success(host, task.url)
+        if html is None:
+            return False
+        if trace:
+            trace.wait("extract queue")
+        await self.extract_queue.put((task, html))
+        return True
+
+    async def fetch_worker(self):
+        """
+        Fetch stage: replay cached pages, fetch new ones and hand the HTML to the extractors.
+        The worker exits between tasks when the concurrency controller shrinks the pool
+        """
+        controller = self.worker_context.controller
+        page_cache = self.worker_context.page_cache
+        me = asyncio.current_task()
+        while (True):
+            if self.stopping.is_set():
+                return
+            if controller and controller.try_retire():
+                return
+            self.idle_fetchers.add(me)
+            try:
+                task = await self.frontier.get()
+            finally:
+                self.idle_fetchers.discard(me)
+            self.in_flight[id(task)] = task
+            handed_off = False
+            trace = self.trace_of(task)
+            if trace:
+                trace.end_wait()
+            try:
+                if self.frontier.out_of_budget:
+                    continue
+                # the quota may have been reached since the task was enqueued
+                if self.frontier.over_quota(task.url):
+                    continue
+
+                # the change feed compares every page with its cached version, so nothing is replayed
+                replay = not self.writer.change_feed and task.url not in self.refresh_urls
+                if replay and page_cache.exists_page(task.url):
+                    with span(trace, "cache replay"):
+                        inner_links = page_cache.get_inner_links(task.url)
+                        await self.enqueue_links(task, inner_links)
+                else:
+                    handed_off = await self.fetch_task(task)
+
+            except CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Fetch Task failed, {task.url}, error: {e}")
+                continue
+            finally:
+                if not handed_off:
+                    self.task_done(task)
+
+    async def extract_worker(self):
+        """
+        Extract stage: turn HTML into a document and links
+        """
+        rules = self.worker_context.rules
+        while (True):
+            task, html = await self.extract_queue.get()
+            handed_off = False
+            trace = self.trace_of(task)
+            if trace:
+                trace.end_wait()
+            try:
+                with span(trace, "extract"):
+                    out_page = await asyncio.to_thread(extract_page, html, task.url, rules,
+                                                       self.boilerplate, trace)
+                if out_page.get("prescan_rejected"):
+                    self.prescan_rejected += 1
+                if trace:
+                    trace.wait("write queue")
+                await self.write_queue.put((task, out_page))
+                handed_off = True
+            except CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Extract Task failed, {task.url}, error: {e}")
+            finally:
+                self.extract_queue.task_done()
+                if not handed_off:
+                    self.task_done(task)
+
+    async def write_worker(self):
+        """
+        Write stage: persist the page metadata and document, then follow the links
+        """
+        page_cache = self.worker_context.page_cache
+        while (True):
+            task, out_page = await self.write_queue.get()
+            trace = self.trace_of(task)
+            if trace:
+                trace.end_wait()
+            try:
+                prev_hash = page_cache.get_content_hash(task.url)
+                page_meta = make_page_meta(task.url, out_page)
+                with span(trace, "write"):
+                    # output first: a write cut short by a stop leaves the page uncached,
+                    # so the resumed run processes it again rather than losing it
+                    doc = out_page["doc"]
+                    if out_page.get("gone"):
+                        await self.writer.write_delete(task.url, "gone", trace)
+                    elif doc:
+                        doc["parent_url"] = task.parent_url
+                        await self.writer.write_page(task.url, doc, prev_hash, trace,
+                                                     doc_hash=page_meta["content_hash"])
+                        self.frontier.mark_collected(task.url)
+                        if self.frontier.collected_pages % 10 == 0:
+                            logger.info(f"{self.frontier.collected_pages} documents collected")
+                    else:
+                        await self.writer.write_page(task.url, None, prev_hash, trace)
+                        logger.info(f"No document from {task.url}")
+                    await page_cache.write(page_meta, trace)
+
+                with span(trace, "enqueue links"):
+                    await self.enqueue_links(task, out_page["inner_links"])
+
+            except CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Write Task failed, {task.url}, error: {e}")
+            finally:
+                self.write_queue.task_done()
+                self.task_done(task)
+
+    def spawn(self, coro):
+        """
+        Start a stage worker
+        """
+        worker = asyncio.create_task(coro)
+        self.worker_lst.append(worker)
+
+    def spawn_fetcher(self):
+        """
+        Start a fetch worker and count it as active
+        """
+        self.worker_context.controller.active += 1
+        self.spawn(self.fetch_worker())
+        self.fetcher_lst.append(self.worker_lst[-1])
+
+    def stage_report(self) -> str:
+        """
+        One-line occupancy of the frontier and stage queues
+        """
+        return (f"frontier {self.frontier.qsize()}, "
+                f"extract {self.extract_queue.occupancy()}, "
+                f"write {self.write_queue.occupancy()}, "
+                f"retry {len(self.retry_scheduler)}")
+
+    async def control_fetchers(self):
+        """
+        Periodically resize the fetch pool from the controller's decision.
+        Shrinking is cooperative: surplus fetchers retire after their current task.
+        Fetchers do not grow while the extract queue is full
+        """
+        controller = self.worker_context.controller
+        while (True):
+            await asyncio.sleep(controller.interval)
+            controller.decide(self.frontier.qsize(), downstream_full=self.extract_queue.full())
+            logger.info(f"Stages: {self.stage_report()}")
+            while controller.active < controller.target:
+                self.spawn_fetcher()
+
+    def stats(self) -> dict:
+        """
+        Per-stage statistics
+        """
+        return {
+            "frontier":{"size":self.frontier.qsize()},
+            "extract":dict(self.extract_queue.stats(), workers=self.extract_workers,
+                           prescan_rejected=self.prescan_rejected),
+            "write":dict(self.write_queue.stats(), workers=self.write_workers),
+            "retry":{
+                "pending":len(self.retry_scheduler),
+                "scheduled":self.retry_scheduler.scheduled,
+                "gave_up":self.gave_up,
+                "circuit":self.circuit_breaker.stats(asyncio.get_running_loop().time())
+            }
+        }
+
+    def request_stop(self, reason: str):
+        """
+        Stop dequeuing new work and drain what is in flight
+        """
+        if self.stopping.is_set():
+            return
+        logger.info(f"Stop requested ({reason}); draining in-flight work")
+        self.stop_reason = reason
+        self.stopping.set()
+
+    async def wait_in_flight(self):
+        """
+        Wait for busy fetchers to finish their task, then for the extract
+        and write stages to process everything handed to them
+        """
+        # wait, not gather: a timeout must leave the fetchers running, so their tasks are checkpointed
+        if self.fetcher_lst:
+            await asyncio.wait(list(self.fetcher_lst))
+        await self.extract_queue.join()
+        await self.write_queue.join()
+
+    async def drain(self, grace_period: float) -> bool:
+        """
+        Let in-flight fetches, extractions and writes finish within `grace_period` seconds.
+        Return False if the grace period ran out
+        """
+        for w in list(self.idle_fetchers):
+            w.cancel()
+        try:
+            await asyncio.wait_for(self.wait_in_flight(), grace_period)
+        except asyncio.TimeoutError:
+            logger.warning(f"Grace period of {grace_period}s exceeded; "
+                           f"dropping in-flight work ({self.stage_report()})")
+            return False
+        return True
+
+    def take_pending(self) -> list[Task]:
+        """
+        Remove and return the unprocessed tasks: frontier, retry queue, and the tasks
+        that were still being fetched, extracted or written when the grace period ran out
+        """
+        tasks = self.frontier.take_pending()
+        retry_tasks = self.retry_scheduler.pop_due(float("inf"))
+        for task in retry_tasks:
+            task.attempt = 0
+        unfinished = self.unfinished
+        self.unfinished = []
+        return unfinished + tasks + retry_tasks
+
+    async def run(self, grace_period: float = 15.0):
+        """
+        Run all stages until the frontier is exhausted or a stop is requested.
+        On stop, no new task is dequeued and in-flight work drains within `grace_period`
+        """
+        controller = self.worker_context.controller
+        for _ in range(self.write_workers):
+            self.spawn(self.write_worker())
+        for _ in range(self.extract_workers):
+            self.spawn(self.extract_worker())
+        for _ in range(controller.target):
+            self.spawn_fetcher()
+        self.spawn(self.control_fetchers())
+        self.spawn(self.retry_pump())
+
+        join_task = asyncio.create_task(self.frontier.join())
+        stop_task = asyncio.create_task(self.stopping.wait())
+        await asyncio.wait({join_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        join_task.cancel()
+        stop_task.cancel()
+
+        if self.stopping.is_set():
+            await self.drain(grace_period)
+
+        self.unfinished = list(self.in_flight.values())
+        for w in self.worker_lst:
+            w.cancel()
+
+        await asyncio.gather(*self.worker_lst, return_exceptions=True)
+
+class CrawlRuntime:
+    """
+    Resources shared by all crawls of a process: the HTTP connection pool,
+    the robots.txt cache, per-host circuit breakers, the extractor warm-up
+    and the page caches (with their boilerplate tables), loaded once per cache file.
+    Each crawl applies its own boilerplate share to the shared table.
+    Together with the global rate limiter, this is the politeness scheduler
+    shared by concurrent jobs.
+    """
+    def __init__(self):
+        self.session = None
+        self.robots_policy = RobotsPolicy()
+        self.circuit_breaker = CircuitBreaker()
+        self.warm_up_task = None
+        self.cache_loads = {} # cache_file -> task loading (PageCache, BoilerplateTable)
+
+    async def load_cache(self, cache_file: str):
+        """
+        Load a page cache and its boilerplate table off the event loop
+        """
+        page_cache = PageCache(cache_file, load=False)
+        await asyncio.to_thread(page_cache.load_file, cache_file)
+        boilerplate_table = BoilerplateTable()
+        await asyncio.to_thread(boilerplate_table.load, boilerplate_file_for(cache_file))
+        return page_cache, boilerplate_table
+
+    async def prepare(self, start_url: str, cache_file: str, boilerplate_share: float,
+                      report: StartupReport, tracing: bool = False):
+        """
+        Get everything a crawl needs, overlapping the blocking startup work:
+        robots.txt fetch, extractor warm-up and cache load run in threads
+        while aiohttp is imported here. Work already done by an earlier crawl is reused.
+        With `tracing`, the connection pool gets the aiohttp trace hooks; they are
+        only attached when the pool is created (by the first crawl).
+        Return (page_cache, boilerplate), boilerplate being None if `boilerplate_share` is 0
+        """
+        if self.warm_up_task is None:
+            self.warm_up_task = asyncio.ensure_future(
+                report.measure("extractor warm-up", asyncio.to_thread(warm_up)))
+        cache_load = self.cache_loads.get(cache_file)
+        if cache_load is None:
+            cache_load = asyncio.ensure_future(
+                report.measure("cache load", self.load_cache(cache_file)))
+            self.cache_loads[cache_file] = cache_load
+        prep = asyncio.gather(
+            report.measure("robots.txt", self.robots_policy.allowed(start_url)),
+            self.warm_up_task,
+            cache_load
+        )
+        await asyncio.sleep(0)
+        if self.session is None:
+            with report.phase("import aiohttp"):
+                from aiohttp import ClientSession
+            trace_configs = [make_trace_config()] if tracing else None
+            self.session = ClientSession(trace_configs=trace_configs)
+        _, _, (page_cache, boilerplate_table) = await prep
+        boilerplate = None
+        if boilerplate_share:
+            boilerplate = BoilerplateFilter(boilerplate_table, boilerplate_share)
+        return page_cache, boilerplate
+
+    async def close(self):
+        """
+        Close the connection pool
+        """
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+def boilerplate_file_for(cache_file: str) -> Path:
+    """
+    Path of the boilerplate table stored next to a cache file
+    """
+    return Path(cache_file).with_suffix(".boilerplate.json")
+
+async def rank_refresher(link_graph: LinkGraph, frontier: TaskQueue, by: str, interval: float = 1.0):
+    """
+    Keep the frontier order in step with the link graph, off the put path.
+    A URL is scored when it is first seen, so the queued URLs are re-scored
+    once their scores may have changed: for "pagerank" after PageRank is
+    recomputed (in a thread), for "indegree" after new pages were added
+    """
+    scored = link_graph.pages_added
+    while (True):
+        await asyncio.sleep(interval)
+        if by == "pagerank":
+            if not link_graph.rank_stale():
+                continue
+            await link_graph.refresh_pagerank()
+        elif link_graph.pages_added == scored:
+            continue
+        scored = link_graph.pages_added
+        frontier.rescore()
+
+async def write_disappeared(start_url: str, frontier: TaskQueue, page_cache: PageCache, writer: JsonWriter):
+    """
+    After a complete crawl, emit deletes for the host's pages that had a document
+    but were not reached this time, and mark them as gone in the cache.
+    Only called when the crawl was not cut short by a budget or a stop
+    """
+    host = urlparse(start_url).netloc
+    prev_docs = [url for url, h in page_cache.content_hashes.items() if h]
+    for url in prev_docs:
+        if url in frontier.seen or urlparse(url).netloc != host:
+            continue
+        if frontier.page_budget and frontier.page_budget.saturated(url):
+            continue # not fetched because of its page type quota
+        await writer.write_delete(url, "disappeared")
+        await page_cache.write({"url":url, "inner_links":[], "content_hash":None})
+
 async def run_pipeline(
         start_url: str,
         out_file: str,
         num_workers,
         max_pages: int = None,
         max_depth: int = None,
-        cache_file: str = None
-):
+        cache_file: str = None,
+        min_workers: int = 1,
+        max_workers: int = 8,
+        extract_workers: int = 1,
+        write_workers: int = 1,
+        stage_queue_size: int = 16,
+        priority: str = None,
+        refresh_top: int = 0,
+        startup_report: StartupReport = None,
+        max_duration: float = None,
+        grace_period: float = 15.0,
+        checkpoint_file: str = None,
+        boilerplate_share: float = 0.5,
+        runtime: CrawlRuntime = None,
+        handle_signals: bool = True,
+        on_start: Callable[[CrawlPipeline], None] = None,
+        change_feed: bool = False,
+        trace_file: str = None,
+        trace_sample: float = 1.0
+) -> dict:
     """
     Orchestrate the entire scraping pipeline.
+    `num_workers` is the initial number of fetch workers; the concurrency controller
+    then adapts it within [min_workers, max_workers].
+    `priority` ("indegree" or "pagerank") orders the frontier by link-graph score,
+    and `refresh_top` re-fetches that many of the highest scored cached pages.
+    If `startup_report` is given, the startup breakdown is logged before crawling.
+    The run stops gracefully after `max_duration` seconds or on SIGTERM: dequeuing stops
+    early enough for in-flight work to drain within `grace_period`, the writer and
+    cache are flushed, and pending tasks are saved to `checkpoint_file` (if given)
+    so the next run resumes from them. The grace period is at most half of `max_duration`.
+    Blocks found on more than `boilerplate_share` of a host's pages are dropped
+    (0 disables it); the learned table is saved next to the cache file.
+    With `change_feed`, every page is re-fetched and only upsert/delete events
+    against the previous crawl are written (see JsonWriter).
+    A long-running process passes its shared `runtime`, handles signals itself and
+    gets the pipeline through `on_start` (e.g. to cancel it with `request_stop`).
+    With `trace_file`, a `trace_sample` share of the URLs is traced per stage and
+    saved in the Chrome trace-event format (see Tracer).
+    Return the run stats.
     """
-    url_queue = TaskQueue(max_pages=max_pages, max_depth=max_depth)
-
+    loop = asyncio.get_running_loop()
+    run_start = loop.time()
+    report = startup_report or StartupReport()
     nm_start_url = normalize_url(start_url, None)
+    own_runtime = runtime is None
+    if own_runtime:
+        runtime = CrawlRuntime()
+
+    page_cache, boilerplate = await runtime.prepare(nm_start_url, cache_file, boilerplate_share, report,
+                                                    tracing=bool(trace_file))
+    with report.phase("rules"):
+        rules = load_rules(nm_start_url)
+
+    link_graph = page_cache.link_graph
+    uses_rank = priority == "pagerank" or (refresh_top and not priority)
+    if uses_rank and link_graph.rank_stale():
+        await link_graph.refresh_pagerank()
+    score_fn = None
+    if priority:
+        score_fn = lambda url: link_graph.score(url, by=priority)
+    page_budget = None
+    quotas = PageTypeBudget.quotas_from_rules(rules["page_types"], max_pages)
+    if quotas:
+        page_budget = PageTypeBudget(lambda url: infer_page_type(url, rules["page_types"]), quotas)
+    url_queue = TaskQueue(max_pages=max_pages, max_depth=max_depth, priority=score_fn,
+                          page_budget=page_budget)
+
     start_task = Task(nm_start_url, 0, None)
-    await url_queue.put(start_task)
+    enqueued = [start_task] if await url_queue.put(start_task) else []
+    if checkpoint_file:
+        resumed = load_checkpoint(checkpoint_file)
+        for task in resumed:
+            if await url_queue.put(task):
+                enqueued.append(task)
+        if resumed:
+            logger.info(f"Resuming {len(resumed)} tasks from {checkpoint_file}")
+    tracer = None
+    if trace_file:
+        tracer = Tracer(sample_rate=trace_sample)
+        for task in enqueued:
+            tracer.enqueued(task.url)
 
-    page_cache = PageCache(cache_file)
-    writer = JsonWriter(out_file)
-    robots_policy = RobotsPolicy()
+    refresh_urls = set()
+    if refresh_top:
+        refresh_urls = set(link_graph.top_urls(refresh_top, by=priority or "pagerank"))
+        logger.info(f"Refreshing {len(refresh_urls)} top cached pages")
 
-    rules = load_rules(nm_start_url)
-    worker_lst = []
-    
-    n_wkrs = num_workers if num_workers and num_workers > 0 else 1
-    session_lst = []
-    for _ in range(n_wkrs):
-        session = ClientSession()
-        session_lst.append(session)
-        worker_context = WorkerContext(session=session, 
-                                       robots_policy=robots_policy, 
-                                       page_cache=page_cache,
-                                       rules=rules
-                                       )
-        worker = asyncio.create_task(pipeline_worker(url_queue, worker_context, writer))
-        worker_lst.append(worker)
-
-    await url_queue.join()
-
-    for w in worker_lst:
-        w.cancel()
-
-    await asyncio.gather(*worker_lst, return_exceptions=True)
-
-    for session in session_lst:
-        await session.close()
-
-    logger.info(f"Done, {url_queue.collected_pages} new documents collected in {out_file}")
\ No newline at end of file
+    writer = JsonWriter(out_file, change_feed=change_feed)
+
+    controller = ConcurrencyController(min_workers=min_workers,
+                                       max_workers=max(max_workers, num_workers or 1),
+                                       initial_workers=num_workers)
+    worker_context = WorkerContext(session=runtime.session, 
+                                   robots_policy=runtime.robots_policy, 
+                                   page_cache=page_cache,
+                                   rules=rules,
+                                   controller=controller
+                                   )
+    pipeline = CrawlPipeline(url_queue, worker_context, writer,
+                             extract_workers=extract_workers,
+                             write_workers=write_workers,
+                             queue_size=stage_queue_size,
+                             refresh_urls=refresh_urls,
+                             circuit_breaker=runtime.circuit_breaker,
+                             boilerplate=boilerplate,
+                             tracer=tracer)
+    if startup_report:
+        report.add("ready", report.t0, time.perf_counter())
+        report.log()
+    if on_start:
+        on_start(pipeline)
+
+    timer = None
+    if max_duration:
+        if grace_period > max_duration / 2:
+            grace_period = max_duration / 2 # keep half of the budget for crawling
+            logger.info(f"Grace period reduced to {grace_period}s (max duration {max_duration}s)")
+        stop_in = max(max_duration - grace_period - (loop.time() - run_start), 0)
+        timer = loop.call_later(stop_in, pipeline.request_stop, f"max duration {max_duration}s")
+    if handle_signals:
+        try:
+            loop.add_signal_handler(signal.SIGTERM, pipeline.request_stop, "SIGTERM")
+        except (NotImplementedError, RuntimeError):
+            handle_signals = False # no signal handling off the main thread or on Windows
+
+    rank_task = None
+    if priority:
+        rank_task = asyncio.create_task(rank_refresher(link_graph, url_queue, priority))
+    try:
+        await pipeline.run(grace_period=grace_period)
+        if change_feed and not pipeline.stopping.is_set() and not url_queue.out_of_budget:
+            await write_disappeared(nm_start_url, url_queue, page_cache, writer)
+    finally:
+        if rank_task:
+            rank_task.cancel()
+        if timer:
+            timer.cancel()
+        if handle_signals:
+            loop.remove_signal_handler(signal.SIGTERM)
+        await writer.flush()
+        await page_cache.flush()
+        if boilerplate:
+            await asyncio.to_thread(boilerplate.table.save, boilerplate_file_for(cache_file))
+        if tracer:
+            await asyncio.to_thread(tracer.save, trace_file)
+            logger.info(f"Trace of {len(tracer.tasks)} tasks saved to {trace_file}")
+        if own_runtime:
+            await runtime.close()
+    pending = []
+    if pipeline.stopping.is_set():
+        pending = pipeline.take_pending()
+    if checkpoint_file:
+        if pending:
+            save_checkpoint(checkpoint_file, pending)
+            logger.info(f"Checkpointed {len(pending)} pending tasks to {checkpoint_file}")
+        else:
+            Path(checkpoint_file).unlink(missing_ok=True)
+
+    duration = loop.time() - run_start
+    stats = {
+        "collected_pages":url_queue.collected_pages,
+        "duration":round(duration, 3),
+        "stop_reason":pipeline.stop_reason or "completed",
+        "pending_tasks":len(pending),
+        "concurrency":controller.stats(),
+        "stages":pipeline.stats(),
+        "link_graph":{"nodes":len(link_graph), "edges":link_graph.n_edges},
+        "boilerplate_blocks_dropped":boilerplate.dropped if boilerplate else 0
+    }
+    if page_budget:
+        stats["page_types"] = page_budget.stats()
+    if change_feed:
+        stats["changes"] = dict(writer.changes)
+        logger.info(f"Changes: {writer.changes['upsert']} upserts, {writer.changes['delete']} deletes, "
+                    f"{writer.changes['unchanged']} unchanged, {writer.changes['no_doc']} without document")
+    logger.info(f"Workers: peak {controller.peak_target}, final {controller.target}, "
+                f"{controller.total_fetches} fetches, {controller.total_errors} errors")
+    logger.info(f"Stages: peak extract {pipeline.extract_queue.peak_size}, "
+                f"peak write {pipeline.write_queue.peak_size}")
+    logger.info(f"Done ({stats['stop_reason']}) in {duration:.1f}s, {len(pending)} tasks pending, "
+                f"{url_queue.collected_pages} new documents collected in {out_file}")
+    return stats
\ No newline at end of file
@@ -0,0 +1,57 @@
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """
+    Wall-clock breakdown of the CLI startup, measured from process start.
+    Phases may overlap (e.g. the warm-up runs while robots.txt is fetched).
+    """
+    def __init__(self, t0: float = None):
+        self.t0 = t0 if t0 is not None else time.perf_counter()
+        self.phases = [] # (name, start offset, duration)
+
+    def add(self, name: str, start: float, end: float):
+        """
+        Record a phase given its perf_counter start/end times
+        """
+        self.phases.append((name, start - self.t0, end - start))
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time the enclosed block as a phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    async def measure(self, name: str, aw):
+        """
+        Await `aw` and record it as a phase
+        """
+        start = time.perf_counter()
+        try:
+            return await aw
+        finally:
+            self.add(name, start, time.perf_counter())
+
+    def elapsed(self) -> float:
+        """
+        Seconds since process start
+        """
+        return time.perf_counter() - self.t0
+
+    def log(self, title: str = "Startup"):
+        """
+        Log each phase and the total time since process start
+        """
+        lines = [f"{title} report (offset +duration):"]
+        for name, offset, duration in sorted(self.phases, key=lambda p: p[1]):
+            lines.append(f"  {name:<20} {offset:7.3f}s +{duration:.3f}s")
+        lines.append(f"  {'total':<20} {self.elapsed():7.3f}s")
+        logger.info("\n".join(lines))
@@ -0,0 +1,30 @@
+import json
+from pathlib import Path
+from pagecollect.frontier import Task
+
+def save_checkpoint(checkpoint_file: str, tasks: list[Task]):
+    """
+    Write pending frontier tasks as JSONL, replacing any previous checkpoint
+    """
+    out_path = Path(checkpoint_file)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f_o:
+        for task in tasks:
+            record = {"url":task.url, "depth":task.depth, "parent_url":task.parent_url}
+            f_o.write(json.dumps(record, ensure_ascii=False) + "\n")
+    tmp_path.replace(out_path)
+
+def load_checkpoint(checkpoint_file: str) -> list[Task]:
+    """
+    Load the pending tasks of an interrupted run, if any
+    """
+    file_path = Path(checkpoint_file)
+    if not file_path.exists():
+        return []
+    tasks = []
+    with open(file_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            tasks.append(Task(record["url"], record["depth"], record["parent_url"]))
+    return tasks
@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 
 def write_text_sync(out_file, text):
     """
@@ -8,9 +9,40 @@ def write_text_sync(out_file, text):
     with open(out_file, "a", encoding="utf-8") as f_o:
         f_o.write(text + "\n")
 
+async def write_text_async(out_file, text):
+    """
+     Append a line of text to a file in a thread.
+     The write is not interrupted by a cancellation: the caller only sees the
+     CancelledError once the line is written, so a lock held around it
+     guarantees no write is in progress
+    """
+    write = asyncio.ensure_future(asyncio.to_thread(write_text_sync, out_file, text))
+    cancelled = False
+    while not write.done():
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError()
+    write.result()
+
 def read_json(file_path):
     """
      Load and a JSON file from disk
     """
     with open(file_path) as f:
         return json.load(f)
+
+def read_lines_from(file_path, offset: int) -> tuple[bytes, int]:
+    """
+     Read the complete lines appended to a file since `offset`.
+     Return the data and the offset to continue from
+    """
+    if not os.path.exists(file_path):
+        return b"", offset
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    return data[:end], offset + end
@@ -1,21 +1,89 @@
 import os
 import json
+import time
+import hashlib
 from pathlib import Path
 import asyncio
-from pagecollect.storage.file_util import write_text_sync
+from pagecollect.storage.file_util import write_text_async
+from pagecollect.tracing import TaskTrace, span
+
+def content_hash(doc: dict | None) -> str | None:
+    """
+    Hash of the fields that matter downstream (title and content_text)
+    """
+    if not doc:
+        return None
+    text = (doc.get("title") or "") + "\n" + (doc.get("content_text") or "")
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
 
 class JsonWriter:
-    def __init__(self, out_file: str):
+    """
+    JSONL output of the crawl.
+    In change-feed mode, only the delta against the previous crawl is written:
+    - {"event": "upsert", "url", "doc"} when a page is new or its title/content_text changed
+    - {"event": "delete", "url", "reason"} when a page is gone (404/410), lost its
+      content or disappeared from the site
+    """
+    def __init__(self, out_file: str, change_feed: bool = False):
         out_path = Path(out_file)
         out_path.parent.mkdir(parents=True, exist_ok=True)
         self.out_file = out_file
+        self.change_feed = change_feed
+        self.changes = {"upsert":0, "delete":0, "unchanged":0, "no_doc":0}
         self.lock = asyncio.Lock()
 
-    async def write(self, page: dict):
+    async def write(self, page: dict, trace: TaskTrace = None):
         """
         Write JSONL asynchronously
         """
         text = json.dumps(page, ensure_ascii=False)
+        start = time.perf_counter()
+        async with self.lock:
+            if trace:
+                trace.add("output lock wait", start, time.perf_counter())
+            with span(trace, "output write"):
+                await write_text_async(self.out_file, text)
+
+    async def write_page(self, url: str, doc: dict | None, prev_hash: str | None,
+                         trace: TaskTrace = None, doc_hash: str = None) -> bool:
+        """
+        Write the outcome of a crawled page; `prev_hash` is its content hash
+        from the previous crawl (None if it had no document) and `doc_hash` the
+        current one (`content_hash(doc)` if not given).
+        Return True if a document was written
+        """
+        if not self.change_feed:
+            if doc:
+                await self.write(doc, trace)
+            return bool(doc)
+
+        if not doc and not prev_hash:
+            self.changes["no_doc"] += 1 # no document then or now
+            return False
+        new_hash = (doc_hash or content_hash(doc)) if doc else None
+        if new_hash == prev_hash:
+            self.changes["unchanged"] += 1
+            return False
+        if doc:
+            await self.write({"event":"upsert", "url":url, "doc":doc}, trace)
+            self.changes["upsert"] += 1
+            return True
+        await self.write_delete(url, "no_content", trace)
+        return False
+
+    async def write_delete(self, url: str, reason: str, trace: TaskTrace = None):
+        """
+        Emit a delete event (change-feed mode only)
+        """
+        if not self.change_feed:
+            return
+        await self.write({"event":"delete", "url":url, "reason":reason}, trace)
+        self.changes["delete"] += 1
+
+    async def flush(self):
+        """
+        Wait until in-progress writes have reached the file
+        """
         async with self.lock:
-            await asyncio.to_thread(write_text_sync, self.out_file, text)
+            pass
     
\ No newline at end of file
@@ -0,0 +1,209 @@
+import asyncio
+import numpy as np
+
+def pagerank_csr(indptr: np.ndarray, indices: np.ndarray, damping: float = 0.85,
+                 max_iter: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """
+    Vectorized power-iteration PageRank of a CSR graph.
+    The rank of dangling nodes (no known out-links) is spread uniformly.
+    Pure function of its inputs, so it can run in a thread
+    """
+    n = len(indptr) - 1
+    if n == 0:
+        return np.zeros(0)
+    out_len = np.diff(indptr)
+    src = np.repeat(np.arange(n), out_len)
+    inv_out = np.zeros(n)
+    np.divide(1.0, out_len, out=inv_out, where=out_len > 0)
+    dangling = out_len == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        contrib = (rank * inv_out)[src]
+        new_rank = np.bincount(indices, weights=contrib, minlength=n)
+        new_rank = damping * (new_rank + rank[dangling].sum() / n) + (1.0 - damping) / n
+        delta = np.abs(new_rank - rank).sum()
+        rank = new_rank
+        if delta < tol:
+            break
+    return rank
+
+class LinkGraph:
+    """
+    Compact store of the discovered link graph.
+    - URLs are interned to int32 ids
+    - Out-links of a page are appended as one contiguous run of an int32 edge array,
+      so (out_start, out_len) per node already is a CSR index
+    - Re-adding a page points it at a new run; the old run is dead until the edge
+      array is compacted, once dead edges pass `compact_min` and half of the array
+    In-degrees are maintained incrementally. PageRank is cached: `score` never
+    recomputes it; `refresh_pagerank` does, off the event loop, once `rank_every`
+    pages were added since the last run.
+    """
+    def __init__(self, capacity: int = 1024, rank_every: int = 100, compact_min: int = 4096):
+        self.ids = {}   # url -> id
+        self.urls = []  # id -> url
+        self.edges = np.zeros(capacity, dtype=np.int32)
+        self.n_edges = 0
+        self.dead_edges = 0 # edges of replaced runs
+        self.compact_min = compact_min
+        self.out_start = np.zeros(capacity, dtype=np.int32)
+        self.out_len = np.zeros(capacity, dtype=np.int32)
+        self.has_page = np.zeros(capacity, dtype=bool) # out-links are known
+        self.in_deg = np.zeros(capacity, dtype=np.int32)
+        self.rank = None # cached PageRank vector
+        self.rank_every = rank_every
+        self.pages_since_rank = 0
+        self.pages_added = 0 # pages added over the graph's life
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def intern(self, url: str) -> int:
+        """
+        Return the id of a URL, adding it as a new node if needed
+        """
+        node = self.ids.get(url)
+        if node is None:
+            node = len(self.urls)
+            self.ids[url] = node
+            self.urls.append(url)
+            if node >= len(self.out_start):
+                size = len(self.out_start) * 2
+                self.out_start = np.resize(self.out_start, size)
+                self.out_len = np.resize(self.out_len, size)
+                self.has_page = np.resize(self.has_page, size)
+                self.in_deg = np.resize(self.in_deg, size)
+            self.out_start[node] = 0
+            self.out_len[node] = 0
+            self.has_page[node] = False
+            self.in_deg[node] = 0
+        return node
+
+    def add_page(self, url: str, links: list[str]):
+        """
+        Append the out-links of a page
+        """
+        src = self.intern(url)
+        dst = np.fromiter((self.intern(lnk) for lnk in links), dtype=np.int32, count=len(links))
+        if self.has_page[src]:
+            start = self.out_start[src]
+            np.subtract.at(self.in_deg, self.edges[start:start + self.out_len[src]], 1)
+            self.dead_edges += int(self.out_len[src])
+        np.add.at(self.in_deg, dst, 1)
+        end = self.n_edges + len(dst)
+        if end > len(self.edges):
+            self.edges = np.resize(self.edges, max(end, len(self.edges) * 2))
+        self.edges[self.n_edges:end] = dst
+        self.out_start[src] = self.n_edges
+        self.out_len[src] = len(dst)
+        self.has_page[src] = True
+        self.n_edges = end
+        self.pages_since_rank += 1
+        self.pages_added += 1
+        if self.dead_edges > max(self.compact_min, self.n_edges // 2):
+            self.compact()
+
+    def compact(self):
+        """
+        Drop the dead runs: rewrite the edge array with the live runs in node-id order
+        """
+        indptr, indices = self.to_csr()
+        n = len(self.urls)
+        self.edges = np.zeros(max(len(indices) * 2, 1024), dtype=np.int32)
+        self.edges[:len(indices)] = indices
+        self.out_start[:n] = indptr[:-1]
+        self.n_edges = len(indices)
+        self.dead_edges = 0
+
+    def has_out_links(self, url: str) -> bool:
+        """
+        Check whether the out-links of a URL are stored
+        """
+        node = self.ids.get(url)
+        return node is not None and bool(self.has_page[node])
+
+    def out_links(self, url: str) -> list[str]:
+        """
+        Return the stored out-links of a URL
+        """
+        node = self.ids.get(url)
+        if node is None:
+            return []
+        start = self.out_start[node]
+        dst = self.edges[start:start + self.out_len[node]]
+        return [self.urls[i] for i in dst]
+
+    def to_csr(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Build (indptr, indices) of the live edges in node-id order
+        """
+        n = len(self.urls)
+        out_len = self.out_len[:n]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(out_len, out=indptr[1:])
+        # position of every live edge in the edge array
+        offsets = np.repeat(self.out_start[:n].astype(np.int64) - indptr[:-1], out_len)
+        indices = self.edges[np.arange(indptr[-1], dtype=np.int64) + offsets]
+        return indptr, indices
+
+    def in_degree(self) -> np.ndarray:
+        """
+        In-degree of every node
+        """
+        return self.in_deg[:len(self.urls)].copy()
+
+    def pagerank(self) -> np.ndarray:
+        """
+        Compute PageRank now (blocking) and cache it for `score`
+        """
+        self.rank = pagerank_csr(*self.to_csr())
+        self.pages_since_rank = 0
+        return self.rank
+
+    def rank_stale(self) -> bool:
+        """
+        Whether enough pages were added to recompute PageRank
+        """
+        return self.rank is None or self.pages_since_rank >= self.rank_every
+
+    async def refresh_pagerank(self):
+        """
+        Recompute PageRank in a thread.
+        The CSR snapshot is taken on the event loop, so the graph may keep growing meanwhile
+        """
+        indptr, indices = self.to_csr()
+        added = self.pages_since_rank
+        self.rank = await asyncio.to_thread(pagerank_csr, indptr, indices)
+        self.pages_since_rank -= added
+
+    def score(self, url: str, by: str = "pagerank") -> float:
+        """
+        Importance score of a URL.
+        - "indegree": current number of known in-links
+        - "pagerank": the cached PageRank (0 for nodes added since it was computed)
+        """
+        node = self.ids.get(url)
+        if node is None:
+            return 0.0
+        if by == "indegree":
+            return float(self.in_deg[node])
+        if self.rank is None or node >= len(self.rank):
+            return 0.0
+        return float(self.rank[node])
+
+    def top_urls(self, n: int, by: str = "pagerank", pages_only: bool = True) -> list[str]:
+        """
+        Return the `n` highest scored URLs
+        """
+        if by == "indegree":
+            scores = self.in_degree().astype(float)
+        else:
+            if self.rank is None:
+                self.pagerank()
+            scores = np.zeros(len(self.urls))
+            scores[:len(self.rank)] = self.rank
+        if pages_only:
+            scores = np.where(self.has_page[:len(scores)], scores, -1.0)
+        order = np.argsort(-scores, kind="stable")[:n]
+        return [self.urls[i] for i in order if scores[i] >= 0]
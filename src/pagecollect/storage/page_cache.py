@@ -1,15 +1,24 @@
 from pathlib import Path
 import json
+import time
 import asyncio
-from pagecollect.storage.file_util import write_text_sync
+from pagecollect.storage.file_util import write_text_async
+from pagecollect.tracing import TaskTrace, span
+from pagecollect.storage.link_graph import LinkGraph
 
 class PageCache:
     """
     Persistent page cache.
+    Inner links are kept in a compact LinkGraph rather than per-URL string lists;
+    the graph also grows with the pages written during the run.
+    The content hash of each page's document is kept for the change feed.
     """
-    def __init__(self, cache_file):
-        self.cache = {}
-        self.load_file(cache_file)
+    def __init__(self, cache_file, load: bool = True):
+        self.cache = set() # urls in the cache file
+        self.link_graph = LinkGraph()
+        self.content_hashes = {} # url -> hash of the last document (None: no document)
+        if load:
+            self.load_file(cache_file)
         out_path = Path(cache_file)
         out_path.parent.mkdir(parents=True, exist_ok=True)
         self.cache_file = cache_file
@@ -27,7 +36,9 @@ class PageCache:
             for line in f:
                 page = json.loads(line)
                 url = page["url"]
-                self.cache[url] = page
+                self.cache.add(url)
+                self.link_graph.add_page(url, page.get("inner_links", []))
+                self.content_hashes[url] = page.get("content_hash")
     
     def exists_page(self, url: str) -> bool:
         """
@@ -35,20 +46,37 @@ class PageCache:
         """
         return url in self.cache
     
+    def get_content_hash(self, url: str) -> str | None:
+        """
+        Content hash of the last document cached for a URL
+        """
+        return self.content_hashes.get(url)
+
     def get_inner_links(self, url: str) -> list[str]:
         """
         Retrieve cached inner links for a given URL
         """
-        entry = self.cache.get(url)
-        if not entry:
-            return []
-        return entry.get("inner_links", [])
+        return self.link_graph.out_links(url)
     
-    async def write(self, page_meta: dict):
+    async def write(self, page_meta: dict, trace: TaskTrace = None):
         """
         Append a new page record to the cache file
         """
+        self.link_graph.add_page(page_meta["url"], page_meta["inner_links"])
+        self.cache.add(page_meta["url"])
+        self.content_hashes[page_meta["url"]] = page_meta.get("content_hash")
         text = json.dumps(page_meta, ensure_ascii=False)
+        start = time.perf_counter()
+        async with self.lock:
+            if trace:
+                trace.add("cache lock wait", start, time.perf_counter())
+            with span(trace, "cache write"):
+                await write_text_async(self.cache_file, text)
+
+    async def flush(self):
+        """
+        Wait until in-progress writes have reached the file
+        """
         async with self.lock:
-            await asyncio.to_thread(write_text_sync, self.cache_file, text)
+            pass
     
\ No newline at end of file
@@ -0,0 +1,170 @@
+import json
+import time
+import zlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+
+class TaskTrace:
+    """
+    Spans of one sampled URL, drawn on their own row of the trace.
+    Between stages the task waits (frontier, retry backoff, stage queues);
+    a wait lasts until the next stage picks the task up.
+    """
+    def __init__(self, tracer: "Tracer", tid: int, url: str):
+        self.tracer = tracer
+        self.tid = tid
+        self.url = url
+        self.start = time.perf_counter()
+        self.waiting = None # (name, start) of the current wait
+
+    def add(self, name: str, start: float, end: float, **args):
+        """
+        Record a span given its perf_counter start/end times
+        """
+        self.tracer.add_event(self.tid, name, start, end, args)
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """
+        Time the enclosed block as a span
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter(), **args)
+
+    def wait(self, name: str):
+        """
+        Start waiting (ends the current wait, if any)
+        """
+        self.end_wait()
+        self.waiting = (name, time.perf_counter())
+
+    def end_wait(self):
+        """
+        Record the current wait as a span
+        """
+        if self.waiting:
+            name, start = self.waiting
+            self.waiting = None
+            self.add(name, start, time.perf_counter())
+
+    def finish(self, **args):
+        """
+        Record the whole life of the task, from enqueue to done
+        """
+        self.end_wait()
+        self.add("task", self.start, time.perf_counter(), url=self.url, **args)
+
+def span(trace: TaskTrace | None, name: str, **args):
+    """
+    `trace.span(...)`, or a no-op if the task is not traced
+    """
+    if trace is None:
+        return nullcontext()
+    return trace.span(name, **args)
+
+class Tracer:
+    """
+    Per-task tracing exported in the Chrome trace-event format
+    (open the file in chrome://tracing or https://ui.perfetto.dev).
+    - A `sample_rate` share of URLs is traced; sampling is by URL hash,
+      so retries of a URL are traced too
+    - Every traced URL gets its own row; spans are complete ("X") events
+    Spans may be added from extractor threads.
+    """
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        self.t0 = time.perf_counter()
+        self.tasks = {} # url -> TaskTrace
+        self.events = []
+        self.lock = threading.Lock()
+
+    def sampled(self, url: str) -> bool:
+        """
+        Whether a URL is traced
+        """
+        return zlib.crc32(url.encode("utf-8")) < self.sample_rate * 2**32
+
+    def enqueued(self, url: str) -> TaskTrace | None:
+        """
+        Start tracing a URL added to the frontier, if it is sampled
+        """
+        if url in self.tasks or not self.sampled(url):
+            return self.tasks.get(url)
+        trace = TaskTrace(self, len(self.tasks) + 1, url)
+        self.tasks[url] = trace
+        trace.wait("frontier wait")
+        return trace
+
+    def get(self, url: str) -> TaskTrace | None:
+        """
+        Trace of a URL, None if it is not traced
+        """
+        return self.tasks.get(url)
+
+    def add_event(self, tid: int, name: str, start: float, end: float, args: dict):
+        """
+        Record a complete event; times are perf_counter seconds
+        """
+        event = {
+            "name":name,
+            "ph":"X",
+            "ts":round((start - self.t0) * 1e6, 1),
+            "dur":round((end - start) * 1e6, 1),
+            "pid":1,
+            "tid":tid
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def save(self, trace_file: str):
+        """
+        Write the trace-event JSON file
+        """
+        meta = [{"name":"process_name", "ph":"M", "pid":1, "args":{"name":"pagecollect"}}]
+        for trace in self.tasks.values():
+            meta.append({"name":"thread_name", "ph":"M", "pid":1, "tid":trace.tid,
+                         "args":{"name":trace.url}})
+            meta.append({"name":"thread_sort_index", "ph":"M", "pid":1, "tid":trace.tid,
+                         "args":{"sort_index":trace.tid}})
+        path = Path(trace_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            events = meta + self.events
+        path.write_text(json.dumps({"traceEvents":events, "displayTimeUnit":"ms"}), encoding="utf-8")
+
+def make_trace_config() -> "TraceConfig":
+    """
+    aiohttp hooks adding connection-pool wait, DNS, connect and
+    response-header spans to traced requests.
+    A request is traced when it is sent with trace_request_ctx={"trace": TaskTrace}
+    """
+    from aiohttp import TraceConfig
+
+    def hook(name):
+        async def on_start(session, ctx, params):
+            if ctx.trace_request_ctx:
+                setattr(ctx, name, time.perf_counter())
+
+        async def on_end(session, ctx, params):
+            start = getattr(ctx, name, None)
+            if start is not None:
+                ctx.trace_request_ctx["trace"].add(name, start, time.perf_counter())
+        return on_start, on_end
+
+    trace_config = TraceConfig()
+    for name, start_signal, end_signal in [
+        ("connection queued", trace_config.on_connection_queued_start, trace_config.on_connection_queued_end),
+        ("dns", trace_config.on_dns_resolvehost_start, trace_config.on_dns_resolvehost_end),
+        ("connect", trace_config.on_connection_create_start, trace_config.on_connection_create_end),
+        ("response headers", trace_config.on_request_start, trace_config.on_request_end),
+    ]:
+        on_start, on_end = hook(name)
+        start_signal.append(on_start)
+        end_signal.append(on_end)
+    return trace_config
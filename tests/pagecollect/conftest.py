@@ -0,0 +1,71 @@
+import asyncio
+from collections import Counter
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+TEXT = " ".join(["Consumers can dispute a debt with the collector in writing."] * 5)
+
+def content_page(title: str, links=(), extra: str = "") -> str:
+    """
+    HTML page yielding a document: a heading, one long paragraph (ending with `extra`) and links
+    """
+    anchors = "".join(f'<a href="{lnk}">{lnk}</a>' for lnk in links)
+    return (f"<html><head><title>{title}</title></head><body><main>"
+            f"<h1>{title}</h1><p>{TEXT}{extra}</p>{anchors}</main></body></html>")
+
+class Site:
+    """
+    Local test site: path -> responses (status, body, content type),
+    served in order; the last one repeats.
+    The body of a redirect (3xx) is its target
+    """
+    def __init__(self, routes: dict, delays: dict = None):
+        self.routes = routes
+        self.delays = delays or {} # path -> seconds before responding
+        self.hits = Counter()
+        self.app = web.Application()
+        self.app.router.add_get("/{path:.*}", self.handle)
+        self.server = TestServer(self.app)
+
+    async def handle(self, request):
+        path = request.path
+        if path == "/robots.txt":
+            return web.Response(text="User-agent: *\nAllow: /\n")
+        responses = self.routes.get(path, [(404, "", "text/html")])
+        status, body, content_type = responses[min(self.hits[path], len(responses) - 1)]
+        self.hits[path] += 1
+        if path in self.delays:
+            await asyncio.sleep(self.delays[path])
+        if 300 <= status < 400:
+            return web.Response(status=status, headers={"Location":body})
+        return web.Response(status=status, text=body, content_type=content_type)
+
+    def url(self, path: str) -> str:
+        return str(self.server.make_url(path))
+
+@pytest.fixture
+def make_html():
+    """
+    The `content_page` factory
+    """
+    return content_page
+
+@pytest_asyncio.fixture
+async def local_site():
+    """
+    Factory starting a local Site: `await local_site(routes, delays)`.
+    The sites are closed after the test
+    """
+    sites = []
+
+    async def start(routes: dict, delays: dict = None) -> Site:
+        site = Site(routes, delays)
+        await site.server.start_server()
+        sites.append(site)
+        return site
+
+    yield start
+    for site in sites:
+        await site.server.close()
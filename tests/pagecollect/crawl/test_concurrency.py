@@ -0,0 +1,31 @@
+from pagecollect.crawl.concurrency import ConcurrencyController
+
+def test_aimd_decisions():
+    controller = ConcurrencyController(min_workers=1, max_workers=4, initial_workers=2)
+
+    # healthy fetches with queued work: grow by one
+    for _ in range(10):
+        controller.record_fetch(0.2, wait=0.05)
+    assert controller.decide(queue_depth=20) == 3
+
+    # timeouts/5xx above the threshold: multiplicative decrease
+    for _ in range(10):
+        controller.record_fetch(0.2, wait=0.05, error=True)
+    assert controller.decide(queue_depth=20) == 1
+
+    # never leave the bounds
+    for _ in range(10):
+        controller.decide(queue_depth=20)
+    assert controller.target == 4
+    assert [d["action"] for d in controller.stats()["decisions"]][:2] == ["increase", "decrease"]
+
+def test_retire_surplus_workers():
+    controller = ConcurrencyController(min_workers=1, max_workers=4, initial_workers=3)
+    controller.active = 3
+    # workers mostly waiting on the rate limiter: shed one
+    controller.record_fetch(0.1, wait=0.5)
+    controller.decide(queue_depth=5)
+    assert controller.target == 2
+    assert controller.try_retire()
+    assert not controller.try_retire()
+    assert controller.active == 2
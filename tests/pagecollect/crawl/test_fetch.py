@@ -0,0 +1,21 @@
+import socket
+import pytest
+from aiohttp import ClientSession
+from pagecollect.context import WorkerContext
+from pagecollect.crawl import fetch
+from pagecollect.crawl.fetch import fetch_page, TemporaryFetchError, FetchError
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.mark.asyncio
+async def test_connection_errors_are_temporary(monkeypatch):
+    monkeypatch.setattr(fetch, "rate", 0)
+    async with ClientSession() as session:
+        context = WorkerContext(session=session)
+        with pytest.raises(TemporaryFetchError):
+            await fetch_page(f"http://127.0.0.1:{unused_port()}/", context)
+        with pytest.raises(FetchError):
+            await fetch_page("not-a-url", context)
@@ -0,0 +1,52 @@
+from pagecollect.frontier import Task
+from pagecollect.crawl.retry import RetryScheduler, CircuitBreaker
+
+def test_retry_heap_order_and_backoff():
+    scheduler = RetryScheduler(base_delay=1.0, max_delay=8.0)
+    scheduler.schedule(Task("https://a.gov/2", 1, None), due=20.0)
+    scheduler.schedule(Task("https://a.gov/1", 1, None), due=10.0)
+
+    assert scheduler.next_due() == 10.0
+    assert scheduler.pop_due(5.0) == []
+    assert [t.url for t in scheduler.pop_due(15.0)] == ["https://a.gov/1"]
+    assert len(scheduler) == 1
+
+    for attempt in range(1, 10):
+        d = min(8.0, 2 ** (attempt - 1))
+        assert d / 2 <= scheduler.backoff(attempt) <= d
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, failure_rate=0.5, cooldown=30.0)
+    host = "a.gov"
+    breaker.record_failure(host, "https://a.gov/1", now=0.0)
+    # retries of the same URL count once
+    breaker.record_failure(host, "https://a.gov/1", now=0.5)
+    assert breaker.wait_time(host, 1.0) == 0.0
+    breaker.record_failure(host, "https://a.gov/2", now=1.0)
+    # open: paused until the cooldown ends
+    assert breaker.wait_time(host, 11.0) == 20.0
+    assert breaker.stats(11.0)["open_hosts"] == [host]
+    # half-open: a single probe goes through; a failed probe opens it again
+    assert breaker.wait_time(host, 31.0) == 0.0
+    assert breaker.wait_time(host, 31.0) > 0
+    breaker.record_failure(host, "https://a.gov/3", now=31.0)
+    assert breaker.wait_time(host, 32.0) == 29.0
+    # any success closes it
+    breaker.record_success(host, "https://a.gov/4")
+    assert breaker.wait_time(host, 32.0) == 0.0
+    assert breaker.stats(32.0) == {"opened":1, "open_hosts":[]}
+
+def test_circuit_breaker_failure_rate():
+    breaker = CircuitBreaker(failure_threshold=3, failure_rate=0.5, window=10)
+    host = "a.gov"
+    # a few bad URLs among good ones do not pause the host
+    for i in range(30):
+        if i % 4 == 0:
+            breaker.record_failure(host, f"https://a.gov/{i}", now=float(i))
+        else:
+            breaker.record_success(host, f"https://a.gov/{i}")
+    assert breaker.stats()["opened"] == 0
+    # a host that fails for most URLs is paused
+    for i in range(30, 36):
+        breaker.record_failure(host, f"https://a.gov/{i}", now=float(i))
+    assert breaker.stats()["opened"] == 1
@@ -0,0 +1,42 @@
+from pagecollect.extraction.boilerplate import BoilerplateTable, BoilerplateFilter
+
+DISCLAIMER = "This page is for informational purposes only and is not legal advice."
+
+def make_blocks(i):
+    return [
+        {"tag":"p", "text":f"Unique paragraph number {i} about consumer finance."},
+        {"tag":"p", "text":DISCLAIMER}
+    ]
+
+def test_repeated_blocks_are_dropped(tmp_path):
+    table = BoilerplateTable(max_share=0.5, min_pages=5)
+    host = "consumerfinance.gov"
+    # not enough pages seen yet: keep everything
+    for i in range(4):
+        assert len(table.filter_blocks(host, make_blocks(i))) == 2
+
+    kept = table.filter_blocks(host, make_blocks(4))
+    assert [b["text"] for b in kept] == ["Unique paragraph number 4 about consumer finance."]
+    # other hosts are counted separately
+    assert len(table.filter_blocks("other.gov", make_blocks(5))) == 2
+
+    table_file = tmp_path / "page_cache.boilerplate.json"
+    table.save(table_file)
+    loaded = BoilerplateTable(max_share=0.5, min_pages=5)
+    loaded.load(table_file)
+    # whitespace and case do not change the fingerprint
+    blocks = [{"tag":"p", "text":"  " + DISCLAIMER.upper()}]
+    assert loaded.filter_blocks(host, blocks) == []
+
+def test_filters_share_a_table():
+    table = BoilerplateTable(min_pages=5)
+    host = "consumerfinance.gov"
+    strict = BoilerplateFilter(table, max_share=0.5)
+    lenient = BoilerplateFilter(table, max_share=1.0)
+    for i in range(5):
+        lenient.filter_blocks(host, make_blocks(i))
+    # pages recorded by one crawl count for the other, but each applies its own share
+    assert len(lenient.filter_blocks(host, make_blocks(5))) == 2
+    assert len(strict.filter_blocks(host, make_blocks(6))) == 1
+    assert (strict.dropped, lenient.dropped) == (1, 0)
+    assert table.hosts[host]["pages"] == 7
@@ -1,6 +1,8 @@
 import json
 from pathlib import Path
 from pagecollect.extraction.extract import extract_page
+from pagecollect.extraction.boilerplate import BoilerplateTable, BoilerplateFilter
+from pagecollect.storage.json_writer import content_hash
 
 def test_extarct_page():
     url = "https://www.consumerfinance.gov/consumer-tools/debt-collection/"
@@ -30,4 +32,25 @@ def test_page_content():
     rules_1 = {}
     out_page = extract_page(html, url, rules_1)
     example_str = "agencies at the Consumer Financial Protection Bureau’s (CFPB) website"
-    assert example_str in out_page["doc"]["content_text"]
\ No newline at end of file
+    assert example_str in out_page["doc"]["content_text"]
+def test_content_hash():
+    url = "https://www.consumerfinance.gov/p"
+    paragraph = " ".join(["Consumers can dispute a debt with the collector in writing."] * 5)
+    disclaimer = " ".join(["This page is for informational purposes only and is not legal advice."] * 3)
+    def make_html(reviewed, body=paragraph):
+        return (f"<html><head><title>P</title></head><body><main><h1>Debts</h1><p>{body}</p>"
+                f"<p>{disclaimer}</p><p>Last reviewed {reviewed}</p></main></body></html>")
+
+    out_page = extract_page(make_html("Oct 1"), url, {})
+    assert out_page["content_hash"] == content_hash(out_page["doc"])
+    # a short paragraph is not part of content_text, so it does not change the hash
+    assert extract_page(make_html("Oct 2"), url, {})["content_hash"] == out_page["content_hash"]
+    assert extract_page(make_html("Oct 1", paragraph + " Or by phone."), url, {})["content_hash"] != out_page["content_hash"]
+
+    # once the disclaimer is boilerplate, the hash is still taken with it
+    table = BoilerplateTable(min_pages=2)
+    for i in range(3):
+        table.filter_blocks("consumerfinance.gov", [{"tag":"p", "text":disclaimer}])
+    out_page_bp = extract_page(make_html("Oct 1"), url, {}, BoilerplateFilter(table, 0.5))
+    assert disclaimer not in out_page_bp["doc"]["content_text"]
+    assert out_page_bp["content_hash"] == out_page["content_hash"]
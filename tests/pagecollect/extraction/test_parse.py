@@ -6,4 +6,43 @@ def test_title():
     html_file = "tests/fixtures/cfpb_debt_collection.html"
     html = Path(html_file).read_text(encoding="utf-8")
     output = parse_page(html)
-    assert output["title"] == "Debt collection | Consumer Financial Protection Bureau"
\ No newline at end of file
+    assert output["title"] == "Debt collection | Consumer Financial Protection Bureau"
+
+
+CONTENT_PAGE = """<html><head><title>Article</title></head><body>
+<div class="promo"><p>Sign up for our newsletter today.</p><a href="/signup">Sign up</a></div>
+<main><div id="article"><h1>Heading</h1><p>Body text.</p>
+<div class="related"><p>Related reading.</p><a href="/related">More</a></div></div></main>
+</body></html>"""
+
+def test_content_rules():
+    expected = ["Heading", "Body text."]
+    for root in [["main"], ["#article"], [".missing", "main"]]:
+        rules = {"root":root, "exclude":[".related"]}
+        output = parse_page(CONTENT_PAGE, rules)
+        assert [b["text"] for b in output["blocks"]] == expected
+        assert output["title"] == "Article"
+        # links are still taken from the whole page
+        assert [lnk["href"] for lnk in output["links"]] == ["/signup", "/related"]
+
+    # no root matches: the whole body is used
+    output = parse_page(CONTENT_PAGE, {"root":["article"]})
+    assert len(output["blocks"]) == 4
+
+NAV_TEASER_PAGE = """<html><head><title>Article</title></head><body>
+<header><nav><article><p>Teaser of another article.</p><a href="/other">Read</a></article></nav></header>
+<article><h1>Heading</h1><p>Body text.</p></article>
+<aside><article><p>Popular this week.</p></article></aside>
+</body></html>"""
+
+def test_root_in_noise_container_is_skipped():
+    # partial parse (tag-name selector) and full parse (CSS selector) agree
+    for root in [["article"], ["body article"]]:
+        output = parse_page(NAV_TEASER_PAGE, {"root":root})
+        assert [b["text"] for b in output["blocks"]] == ["Heading", "Body text."]
+        assert [lnk["href"] for lnk in output["links"]] == ["/other"]
+
+    # a root found only inside a noise container is not used
+    page = NAV_TEASER_PAGE.replace("<article><h1>", "<div><h1>").replace("</p></article>\n<aside>", "</p></div>\n<aside>")
+    output = parse_page(page, {"root":["article"]})
+    assert [b["text"] for b in output["blocks"]] == ["Heading", "Body text."]
@@ -0,0 +1,87 @@
+from pathlib import Path
+from pagecollect.extraction.extract import extract_page
+from pagecollect.extraction.prescan import scan_text_blocks, may_have_content
+from pagecollect.extraction.parse import parse_page
+from pagecollect.extraction.transform import build_page_info
+from pagecollect.extraction import content_filter
+
+FIXTURES = [
+    ("https://www.consumerfinance.gov/consumer-tools/debt-collection/",
+     "tests/fixtures/cfpb_debt_collection.html"),
+    ("https://www.consumerfinance.gov/find-a-housing-counselor",
+     "tests/fixtures/find-a-housing-counselor.html"),
+]
+
+SHORT_PAGE = """<html><head><title>Contact</title>
+<script>var s = "<p>" + "word ".repeat(200) + "</p>";</script></head>
+<body><nav><a href="/about-us">About</a> <a href="/complaint/">Submit a complaint</a></nav>
+<p>Call us at 855-411-2372.</p><p-card>not a paragraph</p-card>
+<!-- <p>old paragraph with many many words</p> -->
+<a href="https://example.com/out">External</a></body></html>"""
+
+WORDS = "consumers can dispute a debt with the collector in writing and ask for proof".split()
+
+def words(n):
+    return " ".join((WORDS * 5)[:n])
+
+def page(body):
+    return f"<html><head><title>T</title></head><body>{body}</body></html>"
+
+CJK_29 = "消费者可以书面形式向债务催收人提出异议并要求对方提供债务证"
+CJK_30 = CJK_29 + "明"
+
+# (name, html, whether the full path finds a long paragraph)
+CASES = [
+    ("29 words", page(f"<p>{words(29)}</p>"), False),
+    ("30 words", page(f"<p>{words(30)}</p>"), True),
+    ("inline tags", page(f"<p>{words(10)} <b>{words(10)}</b> <a href='/x'>{words(10)}</a></p>"), True),
+    # a tag inside a word splits it in two for the parser too
+    ("word split by a tag", page(f"<p>{words(28)} dis<b>pute</b></p>"), True),
+    ("entities", page(f"<p>{words(14)} &amp; {words(15)}</p>"), True),
+    ("nbsp", page("<p>" + "&nbsp;".join(words(30).split()) + "</p>"), True),
+    ("nbsp 29", page("<p>" + "&nbsp;".join(words(29).split()) + "&nbsp;</p>"), False),
+    ("cjk 29", page(f"<p>{CJK_29}</p>"), False),
+    ("cjk 30", page(f"<p>{CJK_30}</p>"), True),
+    # the parser joins the two strings with a space: 30 characters
+    ("cjk split by a tag", page(f"<p>{CJK_29[:15]}<b>{CJK_29[15:]}</b></p>"), True),
+    ("unclosed p", page(f"<p>{words(30)}<div>Footer</div>"), True),
+    ("implicitly closed p", page(f"<p>{words(20)}<p>{words(20)}</p>"), False),
+    ("pre", page(f"<pre>{words(30)}</pre>"), True),
+    ("code in p", page(f"<p>Run <code>{words(30)}</code></p>"), True),
+    ("blockquote", page(f"<blockquote><p>{words(15)}</p><p>{words(15)}</p></blockquote>"), True),
+    ("comment in p", page(f"<p>{words(20)}<!-- {words(20)} -->{words(9)}</p>"), False),
+    ("script in p", page(f"<p>{words(20)}<script>var s = '{words(20)}';</script>{words(9)}</p>"), False),
+    ("script in p, long", page(f"<p>{words(20)}<script>var s = 1;</script>{words(10)}</p>"), True),
+    ("p in nav", page(f"<nav><p>{words(40)}</p></nav>"), False),
+] + [(html_file, Path(html_file).read_text(encoding="utf-8"), True) for _, html_file in FIXTURES]
+
+def full_path_has_content(html: str) -> bool:
+    """
+    Whether the full parse finds a long paragraph, i.e. the page may yield a document
+    """
+    page_info = build_page_info(parse_page(html), "https://www.consumerfinance.gov/p")
+    has_content, _ = content_filter.filter_blocks(page_info["blocks"])
+    return has_content
+
+def test_prescan_never_rejects_a_long_paragraph():
+    for name, html, expected in CASES:
+        has_content = full_path_has_content(html)
+        assert has_content == expected, name
+        if has_content:
+            assert may_have_content(html), name
+
+def test_short_page_is_rejected():
+    url = "https://www.consumerfinance.gov/contact-us/"
+    report = scan_text_blocks(SHORT_PAGE)
+    assert not report["may_have_content"]
+    assert report["longest_run"] == 4
+
+    out_page = extract_page(SHORT_PAGE, url, {})
+    assert out_page["doc"] is None
+    assert out_page["prescan_rejected"]
+    assert sorted(out_page["inner_links"]) == [
+        "https://www.consumerfinance.gov/about-us",
+        "https://www.consumerfinance.gov/complaint",
+    ]
+    # unclosed paragraphs run to the end of the page, so long text is never missed
+    assert may_have_content("<body><p>" + "word " * 200)
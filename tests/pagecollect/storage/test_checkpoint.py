@@ -0,0 +1,16 @@
+from pagecollect.frontier import Task
+from pagecollect.storage.checkpoint import save_checkpoint, load_checkpoint
+
+def test_checkpoint_roundtrip(tmp_path):
+    checkpoint_file = str(tmp_path / "run" / "checkpoint.jsonl")
+    assert load_checkpoint(checkpoint_file) == []
+
+    tasks = [Task("https://a.gov/", 0, None), Task("https://a.gov/é", 1, "https://a.gov/", attempt=2)]
+    save_checkpoint(checkpoint_file, tasks)
+    # the retry count is not kept: a resumed task starts over
+    assert load_checkpoint(checkpoint_file) == [Task("https://a.gov/", 0, None),
+                                                Task("https://a.gov/é", 1, "https://a.gov/")]
+
+    save_checkpoint(checkpoint_file, tasks[:1])
+    assert load_checkpoint(checkpoint_file) == [Task("https://a.gov/", 0, None)]
+    assert not (tmp_path / "run" / "checkpoint.jsonl.tmp").exists()
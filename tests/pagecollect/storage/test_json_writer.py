@@ -0,0 +1,30 @@
+import json
+import pytest
+from pagecollect.storage.json_writer import JsonWriter, content_hash
+
+def make_doc(text):
+    return {"url":"https://a.gov/p", "title":"P", "content_text":text, "meta":{"fetched_at":"now"}}
+
+@pytest.mark.asyncio
+async def test_change_feed(tmp_path):
+    out_file = tmp_path / "changes.jsonl"
+    writer = JsonWriter(str(out_file), change_feed=True)
+    old_doc = make_doc("old text")
+
+    # new page, unchanged page, changed page, page without content, gone page,
+    # page without content in both crawls
+    await writer.write_page("https://a.gov/new", make_doc("new text"), None)
+    await writer.write_page("https://a.gov/p", make_doc("old text"), content_hash(old_doc))
+    await writer.write_page("https://a.gov/p", make_doc("changed text"), content_hash(old_doc))
+    await writer.write_page("https://a.gov/p", None, content_hash(old_doc))
+    await writer.write_delete("https://a.gov/gone", "gone")
+    await writer.write_page("https://a.gov/nav", None, None)
+
+    events = [json.loads(line) for line in out_file.read_text().splitlines()]
+    assert [(e["event"], e["url"]) for e in events] == [
+        ("upsert", "https://a.gov/new"),
+        ("upsert", "https://a.gov/p"),
+        ("delete", "https://a.gov/p"),
+        ("delete", "https://a.gov/gone")
+    ]
+    assert writer.changes == {"upsert":2, "delete":2, "unchanged":1, "no_doc":1}
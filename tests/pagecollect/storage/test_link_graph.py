@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from pagecollect.storage.link_graph import LinkGraph
+
+def test_out_links_and_in_degree():
+    graph = LinkGraph(capacity=2)
+    graph.add_page("a", ["b", "c"])
+    graph.add_page("b", ["c"])
+    graph.add_page("c", ["a"])
+    # re-adding a page replaces its out-links
+    graph.add_page("b", ["a", "c"])
+
+    assert graph.out_links("b") == ["a", "c"]
+    assert graph.out_links("unknown") == []
+    assert graph.in_degree().tolist() == [2, 1, 2]
+    indptr, indices = graph.to_csr()
+    assert indptr.tolist() == [0, 2, 4, 5]
+    assert indices.tolist() == [1, 2, 0, 2, 0]
+
+def test_pagerank():
+    graph = LinkGraph()
+    graph.add_page("hub", ["x", "y", "z"])
+    for url in ["x", "y", "z"]:
+        graph.add_page(url, ["hub"])
+    rank = graph.pagerank()
+    assert np.isclose(rank.sum(), 1.0)
+    assert graph.top_urls(1) == ["hub"]
+    assert graph.score("hub") > graph.score("x")
+
+def test_compaction():
+    graph = LinkGraph(capacity=4, compact_min=8)
+    for i in range(20):
+        # every re-add leaves the previous run dead
+        graph.add_page("a", [f"x{i}", f"y{i}", "b"])
+        graph.add_page("b", ["a"])
+    assert graph.n_edges <= 2 * 4 + 8
+    assert graph.out_links("a") == ["x19", "y19", "b"]
+    assert graph.out_links("b") == ["a"]
+    assert graph.in_degree()[graph.ids["b"]] == 1
+    indptr, indices = graph.to_csr()
+    assert indptr[-1] == 4
+
+@pytest.mark.asyncio
+async def test_score_does_not_recompute():
+    graph = LinkGraph(rank_every=2)
+    graph.add_page("hub", ["x"])
+    graph.add_page("x", ["hub"])
+    assert graph.rank_stale()
+    assert graph.score("hub") == 0.0
+    await graph.refresh_pagerank()
+    assert not graph.rank_stale()
+    assert graph.score("hub") > 0
+    graph.add_page("y", ["hub"])
+    # new nodes score 0 until the next refresh
+    assert graph.score("y") == 0.0
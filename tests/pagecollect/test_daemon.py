@@ -0,0 +1,94 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestServer, TestClient
+from pagecollect.crawl import fetch
+from pagecollect.daemon import CrawlDaemon
+
+def site_routes(make_html) -> dict:
+    """
+    Home page linking to 3 pages
+    """
+    routes = {"/":[(200, make_html("home", ["/a", "/b", "/c"]), "text/html")]}
+    for path in ["/a", "/b", "/c"]:
+        routes[path] = [(200, make_html(path), "text/html")]
+    return routes
+
+@pytest_asyncio.fixture
+async def api(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, "rate", 0)
+    daemon = CrawlDaemon(out_dir=str(tmp_path / "jobs"), cache_file=str(tmp_path / "cache.jsonl"))
+    client = TestClient(TestServer(daemon.make_app()))
+    await client.start_server()
+    yield daemon, client
+    await client.close()
+    await daemon.shutdown()
+
+async def wait_finished(daemon, job_id):
+    await asyncio.wait_for(daemon.jobs[job_id].task, 10)
+
+@pytest.mark.asyncio
+async def test_submit_status_results(api, local_site, make_html):
+    daemon, client = api
+    site = await local_site(site_routes(make_html))
+    resp = await client.post("/jobs", json={"start_url":site.url("/"), "max_pages":10,
+                                            "max_duration":None})
+    assert resp.status == 201
+    job_id = (await resp.json())["id"]
+
+    # follows the output until the job finishes
+    resp = await client.get(f"/jobs/{job_id}/results")
+    docs = [json.loads(line) for line in (await resp.text()).splitlines()]
+    assert sorted(doc["title"] for doc in docs) == ["/a", "/b", "/c", "home"]
+    await wait_finished(daemon, job_id)
+
+    status = await (await client.get(f"/jobs/{job_id}")).json()
+    assert status["state"] == "done"
+    assert status["collected_pages"] == 4
+    assert status["stats"]["stop_reason"] == "completed"
+    assert daemon.jobs[job_id].pipeline is None
+    assert [job["id"] for job in await (await client.get("/jobs")).json()] == [job_id]
+
+@pytest.mark.asyncio
+async def test_cancel(api, local_site, make_html):
+    daemon, client = api
+    site = await local_site(site_routes(make_html), delays={"/a":0.5, "/b":0.5, "/c":0.5})
+    resp = await client.post("/jobs", json={"start_url":site.url("/"), "grace_period":5})
+    job_id = (await resp.json())["id"]
+    await asyncio.sleep(0.2)
+    resp = await client.delete(f"/jobs/{job_id}")
+    assert resp.status == 202
+    assert (await resp.json())["state"] == "stopping"
+    await wait_finished(daemon, job_id)
+
+    status = await (await client.get(f"/jobs/{job_id}")).json()
+    assert status["state"] == "cancelled"
+    assert status["stats"]["stop_reason"] == "cancelled"
+    assert daemon.jobs[job_id].pipeline is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("body", [
+    {"max_pages":10}, # no start_url
+    {"start_url":"https://a.gov/", "max_page":10}, # unknown option
+    {"start_url":"https://a.gov/", "max_pages":"abc"},
+    {"start_url":"https://a.gov/", "max_pages":True},
+    {"start_url":"https://a.gov/", "max_workers":None},
+    {"start_url":"https://a.gov/", "boilerplate_share":"0.5"},
+    {"start_url":"https://a.gov/", "change_feed":1},
+    {"start_url":"https://a.gov/", "priority":"random"},
+    ["https://a.gov/"]
+])
+async def test_invalid_submissions(api, body):
+    daemon, client = api
+    resp = await client.post("/jobs", json=body)
+    assert resp.status == 400
+    assert daemon.jobs == {}
+
+@pytest.mark.asyncio
+async def test_unknown_job(api):
+    _, client = api
+    assert (await client.post("/jobs", data="not json")).status == 400
+    for resp in [await client.get("/jobs/nope"), await client.delete("/jobs/nope"),
+                 await client.get("/jobs/nope/results")]:
+        assert resp.status == 404
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from pagecollect.frontier import Task, TaskQueue, PageTypeBudget, StageQueue
+from pagecollect.extraction.extract import infer_page_type
+from pagecollect.storage.link_graph import LinkGraph
+
+PAGE_TYPE_RULES = [
+    {"match":"/newsroom/", "type":"press_release", "weight":0.2},
+    {"match":"/compliance/", "type":"compliance", "quota":5, "weight":0.5},
+    {"match":"/data-research/", "type":"dataset"}
+]
+
+def test_quotas_from_rules():
+    assert PageTypeBudget.quotas_from_rules(PAGE_TYPE_RULES, 10) == {"press_release":2, "compliance":5}
+    assert PageTypeBudget.quotas_from_rules(PAGE_TYPE_RULES, 4) == {"press_release":1, "compliance":2}
+    # weights need a global budget
+    assert PageTypeBudget.quotas_from_rules(PAGE_TYPE_RULES, None) == {"compliance":5}
+
+@pytest.mark.asyncio
+async def test_saturated_page_types_are_not_enqueued():
+    quotas = PageTypeBudget.quotas_from_rules(PAGE_TYPE_RULES, 10)
+    budget = PageTypeBudget(lambda url: infer_page_type(url, PAGE_TYPE_RULES), quotas)
+    queue = TaskQueue(max_pages=10, page_budget=budget)
+    host = "https://www.consumerfinance.gov"
+
+    await queue.put(Task(f"{host}/newsroom/a", 1, None))
+    await queue.put(Task(f"{host}/newsroom/b", 1, None))
+    queue.mark_collected(f"{host}/newsroom/a")
+    # a task enqueued before the quota was reached is skipped at dequeue
+    queue.mark_collected(f"{host}/newsroom/b")
+    assert queue.over_quota(f"{host}/newsroom/b")
+
+    assert not await queue.put(Task(f"{host}/newsroom/c", 1, None))
+    assert await queue.put(Task(f"{host}/data-research/d", 1, None))
+    # a skipped URL linked from another page is not counted again
+    assert not await queue.put(Task(f"{host}/newsroom/c", 2, f"{host}/data-research/d"))
+    assert queue.qsize() == 3
+    assert queue.collected_pages == 2
+
+    stats = budget.stats()
+    assert stats["press_release"] == {"collected":2, "quota":2, "skipped":2}
+    assert stats["compliance"] == {"collected":0, "quota":5, "skipped":0}
+
+@pytest.mark.asyncio
+async def test_stage_queue_backpressure():
+    queue = StageQueue("extract", maxsize=2)
+    await queue.put(1)
+    await queue.put(2)
+    assert queue.full()
+    assert queue.occupancy() == "2/2"
+
+    # a full queue blocks its producer until a consumer takes an item
+    producer = asyncio.create_task(queue.put(3))
+    await asyncio.sleep(0.05)
+    assert not producer.done()
+    assert await queue.get() == 1
+    queue.task_done()
+    await asyncio.wait_for(producer, 1)
+
+    stats = queue.stats()
+    assert stats["size"] == 2
+    assert stats["peak_size"] == 2
+    assert stats["blocked_time"] >= 0.04
+
+@pytest.mark.asyncio
+async def test_rescore_ranks_urls_that_gained_in_links():
+    graph = LinkGraph()
+    queue = TaskQueue(priority=lambda url: graph.score(url, by="indegree"))
+    # "/early" is found first with one in-link, "/a" and "/b" later with two
+    graph.add_page("/", ["/early", "/a", "/b"])
+    graph.add_page("/x", ["/a", "/b"])
+    for url in ["/early", "/a", "/b"]:
+        await queue.put(Task(url, 1, "/"))
+    # then pages crawled meanwhile link to "/early"
+    for src in ["/y", "/z", "/w"]:
+        graph.add_page(src, ["/early"])
+
+    queue.rescore()
+    assert [(await queue.get()).url for _ in range(3)] == ["/early", "/a", "/b"]
+    for _ in range(3):
+        queue.task_done()
+    await asyncio.wait_for(queue.join(), 1) # rescoring keeps one slot per task
@@ -0,0 +1,222 @@
+import asyncio
+import json
+from collections import Counter
+from urllib.parse import urlparse
+import pytest
+from aiohttp import ClientSession
+from pagecollect.context import WorkerContext
+from pagecollect.frontier import Task, TaskQueue
+from pagecollect.pipeline import CrawlPipeline, CrawlRuntime, load_rules, run_pipeline, rank_refresher
+from pagecollect.crawl import fetch
+from pagecollect.crawl.concurrency import ConcurrencyController
+from pagecollect.crawl.retry import RetryScheduler, CircuitBreaker
+from pagecollect.crawl.robots import RobotsPolicy
+from pagecollect.storage.json_writer import JsonWriter
+from pagecollect.storage.page_cache import PageCache
+from pagecollect.storage.link_graph import LinkGraph
+from pagecollect.startup import StartupReport
+
+def make_pipeline(session, start_url, tmp_path, writer=None,
+                  circuit_breaker=None) -> CrawlPipeline:
+    frontier = TaskQueue(max_depth=5)
+    frontier.seen.add(start_url)
+    frontier.put_task(Task(start_url, 0, None))
+    context = WorkerContext(session=session,
+                            robots_policy=RobotsPolicy(),
+                            page_cache=PageCache(str(tmp_path / "cache.jsonl")),
+                            rules=load_rules(start_url),
+                            controller=ConcurrencyController(min_workers=1, max_workers=2,
+                                                             initial_workers=2))
+    writer = writer or JsonWriter(str(tmp_path / "out.jsonl"))
+    return CrawlPipeline(frontier, context, writer,
+                         retry_scheduler=RetryScheduler(base_delay=0.01, max_attempts=2),
+                         circuit_breaker=circuit_breaker or CircuitBreaker(failure_threshold=100))
+
+class SlowWriter(JsonWriter):
+    async def write_page(self, url, doc, prev_hash, trace=None, doc_hash=None):
+        if url.endswith("/slow-write"):
+            await asyncio.sleep(10)
+        return await super().write_page(url, doc, prev_hash, trace, doc_hash)
+
+class FailingWriter(JsonWriter):
+    async def write_page(self, url, doc, prev_hash, trace=None, doc_hash=None):
+        if url.endswith("/boom"):
+            raise RuntimeError("disk full")
+        return await super().write_page(url, doc, prev_hash, trace, doc_hash)
+
+@pytest.mark.asyncio
+async def test_task_done_once_per_path(tmp_path, monkeypatch, local_site, make_html):
+    monkeypatch.setattr(fetch, "rate", 0)
+    ok = (200, make_html("ok"), "text/html")
+    paths = ["/ok", "/retry", "/gave-up", "/gone", "/pdf", "/boom"]
+    routes = {
+        "/":[(200, make_html("home", paths), "text/html")],
+        "/ok":[ok],
+        "/retry":[(503, "", "text/html"), ok],
+        "/gave-up":[(503, "", "text/html")],
+        "/pdf":[(200, "%PDF", "application/pdf")],
+        "/boom":[ok]
+    }
+    site = await local_site(routes)
+    async with ClientSession() as session:
+        writer = FailingWriter(str(tmp_path / "out.jsonl"))
+        pipeline = make_pipeline(session, site.url("/"), tmp_path, writer)
+        done = Counter()
+        task_done = pipeline.task_done
+        def count_done(task):
+            done[urlparse(task.url).path] += 1
+            task_done(task)
+        pipeline.task_done = count_done
+
+        await asyncio.wait_for(pipeline.run(), 20)
+
+    # success, retried, given up, gone, skipped (not HTML) and failed (write error)
+    assert done == Counter({path:1 for path in ["/"] + paths})
+    assert site.hits["/retry"] == 2
+    assert site.hits["/gave-up"] == 2
+    assert pipeline.gave_up == 1
+    assert pipeline.frontier.collected_pages == 3 # home, ok and retry
+
+@pytest.mark.asyncio
+async def test_bad_urls_do_not_pause_a_healthy_host(tmp_path, monkeypatch, local_site, make_html):
+    monkeypatch.setattr(fetch, "rate", 0)
+    ok = (200, make_html("ok"), "text/html")
+    paths = [f"/p/{i}" for i in range(30)]
+    routes = {"/":[(200, make_html("home", paths), "text/html")]}
+    for i, path in enumerate(paths):
+        # 8 of the 31 URLs always fail, several of them in a row
+        routes[path] = [(503, "", "text/html")] if i in {3, 4, 5, 6, 7, 12, 20, 28} else [ok]
+    site = await local_site(routes)
+    async with ClientSession() as session:
+        breaker = CircuitBreaker()
+        pipeline = make_pipeline(session, site.url("/"), tmp_path, circuit_breaker=breaker)
+        await asyncio.wait_for(pipeline.run(), 10)
+
+    assert breaker.stats() == {"opened":0, "open_hosts":[]}
+    assert pipeline.gave_up == 8
+    assert pipeline.frontier.collected_pages == 23
+
+@pytest.mark.asyncio
+async def test_drained_run_keeps_unfinished_tasks(tmp_path, monkeypatch, local_site, make_html):
+    monkeypatch.setattr(fetch, "rate", 0)
+    ok = (200, make_html("ok"), "text/html")
+    routes = {
+        "/":[(200, make_html("home", ["/ok", "/slow-fetch", "/slow-write"]), "text/html")],
+        "/ok":[ok],
+        "/slow-fetch":[ok],
+        "/slow-write":[ok]
+    }
+    site = await local_site(routes, delays={"/slow-fetch":10})
+    async with ClientSession() as session:
+        writer = SlowWriter(str(tmp_path / "out.jsonl"))
+        pipeline = make_pipeline(session, site.url("/"), tmp_path, writer)
+        run = asyncio.create_task(pipeline.run(grace_period=0.2))
+        for _ in range(500):
+            if site.hits["/slow-fetch"] and site.hits["/slow-write"] and site.hits["/ok"]:
+                break
+            await asyncio.sleep(0.01)
+        assert not run.done()
+        await asyncio.sleep(0.1)
+        pipeline.request_stop("test")
+        await asyncio.wait_for(run, 5)
+
+    pending = [urlparse(task.url).path for task in pipeline.take_pending()]
+    written = [urlparse(json.loads(line)["url"]).path
+               for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    # the fetch in flight and the page being written are kept; the other
+    # pages are either written or kept, never lost or duplicated
+    assert {"/slow-fetch", "/slow-write"} <= set(pending)
+    assert sorted(pending + written) == ["/", "/ok", "/slow-fetch", "/slow-write"]
+    assert pipeline.take_pending() == []
+
+@pytest.mark.asyncio
+async def test_unchanged_recrawl_emits_no_events(tmp_path, monkeypatch, local_site, make_html):
+    monkeypatch.setattr(fetch, "rate", 0)
+    disclaimer = " ".join(["This page is for informational purposes only and is not legal advice."] * 3)
+    paths = [f"/p/{i}" for i in range(30)]
+    routes = {"/":[(200, make_html("home", paths), "text/html")]}
+    for i, path in enumerate(paths):
+        # the disclaimer becomes boilerplate once the table has seen 20 pages
+        html = make_html(f"page {i}", extra=f" See form {i}.")
+        html = html.replace("</main>", f"<p>{disclaimer}</p></main>")
+        routes[path] = [(200, html, "text/html")]
+    cache_file = str(tmp_path / "cache.jsonl")
+    site = await local_site(routes)
+    for run in ["first", "second"]:
+        out_file = tmp_path / f"{run}.jsonl"
+        stats = await asyncio.wait_for(
+            run_pipeline(site.url("/"), str(out_file), 2, max_pages=100, cache_file=cache_file,
+                         change_feed=True, handle_signals=False), 20)
+
+    assert stats["boilerplate_blocks_dropped"] == 30 # learned in the first crawl
+    assert stats["changes"] == {"upsert":0, "delete":0, "unchanged":31, "no_doc":0}
+    assert not out_file.exists() # nothing was written
+
+@pytest.mark.asyncio
+async def test_trace_hooks_only_when_tracing(tmp_path, local_site):
+    site = await local_site({})
+    for tracing in [False, True]:
+        runtime = CrawlRuntime()
+        await runtime.prepare(site.url("/"), str(tmp_path / "cache.jsonl"), 0.5, StartupReport(),
+                              tracing=tracing)
+        assert len(runtime.session.trace_configs) == int(tracing)
+        await runtime.close()
+
+@pytest.mark.asyncio
+async def test_failed_probe_request_ends_the_probe(tmp_path, monkeypatch, local_site, make_html):
+    monkeypatch.setattr(fetch, "rate", 0)
+    routes = {
+        "/loop":[(302, "/loop", "text/html")],
+        "/ok":[(200, make_html("ok"), "text/html")]
+    }
+    site = await local_site(routes)
+    async with ClientSession() as session:
+        breaker = CircuitBreaker(probe_wait=0.05)
+        # the host's cooldown is over: the next request is the probe
+        breaker.open_until[urlparse(site.url("/")).netloc] = 0
+        pipeline = make_pipeline(session, site.url("/loop"), tmp_path, circuit_breaker=breaker)
+        pipeline.frontier.seen.add(site.url("/ok"))
+        pipeline.frontier.put_task(Task(site.url("/ok"), 1, None))
+        await asyncio.wait_for(pipeline.run(), 5)
+
+    # the redirect loop says nothing about the host; /ok became the next probe and closed the circuit
+    assert site.hits["/ok"] == 1
+    assert pipeline.frontier.collected_pages == 1
+    assert breaker.probing == set() and breaker.open_until == {}
+
+@pytest.mark.asyncio
+async def test_grace_period_longer_than_max_duration(tmp_path, monkeypatch, local_site, make_html):
+    monkeypatch.setattr(fetch, "rate", 0)
+    paths = [f"/p/{i}" for i in range(50)]
+    routes = {"/":[(200, make_html("home", paths), "text/html")]}
+    for i, path in enumerate(paths):
+        routes[path] = [(200, make_html(f"page {i}", extra=f" See form {i}."), "text/html")]
+    site = await local_site(routes, delays={path:0.1 for path in paths})
+    stats = await asyncio.wait_for(
+        run_pipeline(site.url("/"), str(tmp_path / "out.jsonl"), 2, max_pages=100,
+                     cache_file=str(tmp_path / "cache.jsonl"), max_duration=1.0, grace_period=15,
+                     checkpoint_file=str(tmp_path / "checkpoint.jsonl"), handle_signals=False), 5)
+
+    # the grace period is cut to half the budget: the first half is spent crawling
+    assert stats["stop_reason"] == "max duration 1.0s"
+    assert stats["collected_pages"] > 5
+    assert stats["pending_tasks"] > 0
+    assert stats["duration"] < 1.5
+
+@pytest.mark.asyncio
+async def test_rank_refresher_rescores_the_frontier():
+    graph = LinkGraph()
+    queue = TaskQueue(priority=lambda url: graph.score(url, by="indegree"))
+    graph.add_page("/", ["/early", "/late"])
+    graph.add_page("/x", ["/late"])
+    await queue.put(Task("/early", 1, "/"))
+    await queue.put(Task("/late", 1, "/"))
+    refresher = asyncio.create_task(rank_refresher(graph, queue, "indegree", interval=0.01))
+    try:
+        await asyncio.sleep(0.02)
+        graph.add_page("/y", ["/early"])
+        graph.add_page("/z", ["/early"])
+        await asyncio.sleep(0.05)
+    finally:
+        refresher.cancel()
+    assert (await queue.get()).url == "/early"
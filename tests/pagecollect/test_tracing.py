@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+from pagecollect.tracing import Tracer
+from pagecollect.extraction.extract import extract_page
+
+def test_sampling():
+    urls = [f"https://www.consumerfinance.gov/p/{i}" for i in range(1000)]
+    tracer = Tracer(sample_rate=0.1)
+    sampled = [url for url in urls if tracer.sampled(url)]
+    assert 50 < len(sampled) < 150
+    # sampling is by URL, so it is stable
+    assert sampled == [url for url in urls if Tracer(sample_rate=0.1).sampled(url)]
+    assert not any(Tracer(sample_rate=0).sampled(url) for url in urls)
+
+def test_trace_events(tmp_path):
+    url = "https://www.consumerfinance.gov/consumer-tools/debt-collection/"
+    html = Path("tests/fixtures/cfpb_debt_collection.html").read_text(encoding="utf-8")
+    tracer = Tracer(sample_rate=1.0)
+    trace = tracer.enqueued(url)
+    assert tracer.enqueued(url) is trace
+    trace.wait("extract queue")
+    trace.end_wait()
+    extract_page(html, url, {}, trace=trace)
+    trace.finish()
+
+    trace_file = tmp_path / "trace.json"
+    tracer.save(trace_file)
+    events = json.loads(trace_file.read_text())["traceEvents"]
+    spans = [e["name"] for e in events if e["ph"] == "X"]
+    assert spans[:4] == ["frontier wait", "extract queue", "prescan", "parse"]
+    assert spans[-1] == "task"
+    assert all(e["dur"] >= 0 and e["tid"] == trace.tid for e in events if e["ph"] == "X")
+    names = [e["args"]["name"] for e in events if e["name"] == "thread_name"]
+    assert names == [url]